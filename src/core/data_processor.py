@@ -5,18 +5,71 @@
 """
 
 import pandas as pd
-from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import re
+import weakref
+from typing import List, Dict, Any, Optional, Tuple, Callable
 import copy
+import logging
+from functools import lru_cache
 from src.utils.logger import get_logger
 
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
 logger = get_logger("DataProcessor")
 
+# 合计行关键词及其预编译匹配模式
+_SUMMARY_KEYWORDS = ('合计', '总计', '小计', 'Total', 'Sum')
+_SUMMARY_PATTERN = re.compile("|".join(map(re.escape, _SUMMARY_KEYWORDS)))
+
+
+def _as_join_key(series: pd.Series) -> pd.Series:
+    """
+    将纯文本的关联字段转换为PyArrow字符串类型，加速哈希与比较
+    
+    Args:
+        series: 关联字段数据
+    
+    Returns:
+        pd.Series: 转换后的数据；非纯文本列或未安装pyarrow时原样返回
+    """
+    if not _HAS_PYARROW or pd.api.types.is_numeric_dtype(series):
+        return series
+    if pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        return series
+    return series.astype('string[pyarrow]')
+
+
+@lru_cache(maxsize=4096)
+def _get_excel_column_name(index: int) -> str:
+    """
+    将列索引转换为Excel列名（A, B, C, ...）
+    
+    Args:
+        index: 列索引（从0开始）
+    
+    Returns:
+        str: Excel列名
+    """
+    result = ""
+    while index >= 0:
+        result = chr(65 + (index % 26)) + result
+        index = index // 26 - 1
+    return result
+
 class DataProcessor:
     """
     数据处理器
     提供列删除、数据预览等功能
     """
     
+    # 跨工作表关联时明细表需要的列（发票号码及货物名称）
+    DETAIL_SHEET_COLUMNS = ('数电发票号码', '发票号码', '货物或应税劳务名称')
+    
     def __init__(self):
         self.original_data = None
         self.processed_data = None
@@ -24,6 +77,9 @@ class DataProcessor:
         self.columns_to_recalculate = []  # 需要重新计算合计的列
         self.processing_history = []
         self.cross_sheet_data = {}  # 存储跨工作表关联数据
+        self._numeric_cols_cache = {}  # 数值列缓存，键为(id(df), shape)
+        self._summary_idx_cache = {}  # 合计行索引缓存，键为(id(df), shape)
+        self._detail_indexes = {}  # 明细表首行索引缓存，键为(明细表名, 发票号码列)
     
     def load_data(self, data: pd.DataFrame) -> bool:
         """
@@ -40,10 +96,13 @@ class DataProcessor:
                 logger.error("数据为空")
                 return False
             
-            self.original_data = data.copy()
-            self.processed_data = data.copy()
+            # 直接引用调用方的数据（可能是读取器的缓存），本类只生成新对象、不原地修改
+            self.original_data = data
+            self.processed_data = data
+            self._numeric_cols_cache.clear()
+            self._summary_idx_cache.clear()
             
-            logger.info(f"加载数据成功: {len(data)} 行 x {len(data.columns)} 列")
+            logger.info("加载数据成功: %s 行 x %s 列", len(data), len(data.columns))
             return True
             
         except Exception as e:
@@ -66,17 +125,17 @@ class DataProcessor:
                 return False
             
             # 验证列名是否存在
-            available_columns = self.original_data.columns.tolist()
+            available_columns = set(self.original_data.columns)
             invalid_columns = [col for col in columns if col not in available_columns]
             
             if invalid_columns:
-                logger.warning(f"以下列名不存在: {invalid_columns}")
+                logger.warning("以下列名不存在: %s", invalid_columns)
             
             # 只保留存在的列名
             valid_columns = [col for col in columns if col in available_columns]
             self.columns_to_delete = valid_columns
             
-            logger.info(f"设置要删除的列: {len(valid_columns)} 个")
+            logger.info("设置要删除的列: %s 个", len(valid_columns))
             return True
             
         except Exception as e:
@@ -99,13 +158,13 @@ class DataProcessor:
                 return True, "无需删除列"
             
             # 检查是否会删除所有列
-            remaining_columns = [col for col in self.original_data.columns if col not in self.columns_to_delete]
+            remaining_columns = self._remaining_columns()
             
-            if not remaining_columns:
+            if remaining_columns.empty:
                 return False, "不能删除所有列，请至少保留一列数据"
             
             # 检查删除的列是否存在
-            available_columns = self.original_data.columns.tolist()
+            available_columns = set(self.original_data.columns)
             invalid_columns = [col for col in self.columns_to_delete if col not in available_columns]
             
             if invalid_columns:
@@ -117,6 +176,16 @@ class DataProcessor:
             logger.error(f"验证删除操作失败: {e}")
             return False, f"验证失败: {str(e)}"
     
+    def _remaining_columns(self) -> pd.Index:
+        """
+        获取删除指定列后剩余的列
+        
+        Returns:
+            pd.Index: 剩余列（保持原有顺序）
+        """
+        columns = self.original_data.columns
+        return columns[~columns.isin(self.columns_to_delete)]
+    
     def generate_preview(self, preview_rows: int = 10) -> Dict[str, pd.DataFrame]:
         """
         生成删除前后的数据预览
@@ -132,14 +201,14 @@ class DataProcessor:
                 logger.error("没有加载数据")
                 return {'before': pd.DataFrame(), 'after': pd.DataFrame()}
             
-            # 删除前的预览
-            before_preview = self.original_data.head(preview_rows).copy()
+            # 删除前的预览（只拷贝预览行，调用方修改预览不会影响原始数据）
+            before_preview = self.original_data.iloc[:preview_rows].copy()
             
             # 删除后的预览
-            remaining_columns = [col for col in self.original_data.columns if col not in self.columns_to_delete]
-            after_preview = self.original_data[remaining_columns].head(preview_rows).copy()
+            remaining_columns = self._remaining_columns()
+            after_preview = before_preview.loc[:, remaining_columns].copy()
             
-            logger.info(f"生成预览数据: 删除前 {len(before_preview.columns)} 列, 删除后 {len(after_preview.columns)} 列")
+            logger.info("生成预览数据: 删除前 %s 列, 删除后 %s 列", len(before_preview.columns), len(after_preview.columns))
             
             return {
                 'before': before_preview,
@@ -162,6 +231,9 @@ class DataProcessor:
                 logger.error("没有加载数据")
                 return False
             
+            self._numeric_cols_cache.clear()
+            self._summary_idx_cache.clear()
+            
             # 如果有要删除的列，验证删除操作
             if self.columns_to_delete:
                 is_valid, error_msg = self.validate_deletion()
@@ -170,24 +242,25 @@ class DataProcessor:
                     return False
                 
                 # 执行删除操作
-                remaining_columns = [col for col in self.original_data.columns if col not in self.columns_to_delete]
-                self.processed_data = self.original_data[remaining_columns].copy()
+                remaining_columns = self._remaining_columns()
+                self.processed_data = self.original_data.loc[:, remaining_columns]
                 
                 # 记录处理历史
                 processing_record = {
                     'action': 'delete_columns',
-                    'deleted_columns': self.columns_to_delete.copy(),
+                    'deleted_columns': tuple(self.columns_to_delete),
                     'original_columns_count': len(self.original_data.columns),
                     'remaining_columns_count': len(self.processed_data.columns),
                     'data_rows': len(self.processed_data)
                 }
                 self.processing_history.append(processing_record)
                 
-                logger.info(f"数据处理完成: 删除了 {len(self.columns_to_delete)} 列, 保留 {len(remaining_columns)} 列")
-                logger.info(f"删除的列: {', '.join(self.columns_to_delete)}")
+                logger.info("数据处理完成: 删除了 %s 列, 保留 %s 列", len(self.columns_to_delete), len(remaining_columns))
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("删除的列: %s", ', '.join(map(str, self.columns_to_delete)))
             else:
-                # 没有要删除的列，直接复制原始数据
-                self.processed_data = self.original_data.copy()
+                # 没有要删除的列，直接使用原始数据
+                self.processed_data = self.original_data
                 
                 # 记录处理历史
                 processing_record = {
@@ -204,11 +277,11 @@ class DataProcessor:
             # 如果有需要重新计算的列，更新合计行
             if self.columns_to_recalculate:
                 # 获取保留的数值列（排除已删除的列）
-                remaining_columns = self.processed_data.columns.tolist()
+                remaining_columns = set(self.processed_data.columns)
                 remaining_recalc_columns = [col for col in self.columns_to_recalculate if col in remaining_columns]
                 if remaining_recalc_columns:
                     self.update_summary_row(remaining_recalc_columns)
-                    logger.info(f"重新计算了合计行中的 {len(remaining_recalc_columns)} 列")
+                    logger.info("重新计算了合计行中的 %s 列", len(remaining_recalc_columns))
             
             return True
             
@@ -221,7 +294,7 @@ class DataProcessor:
         获取处理结果摘要
         
         Returns:
-            Dict[str, Any]: 处理摘要信息
+            Dict[str, Any]: 处理摘要信息（列表类字段为只读元组快照）
         """
         if self.original_data is None:
             return {}
@@ -230,11 +303,11 @@ class DataProcessor:
             'original_columns_count': len(self.original_data.columns),
             'original_rows_count': len(self.original_data),
             'deleted_columns_count': len(self.columns_to_delete),
-            'deleted_columns': self.columns_to_delete.copy(),
+            'deleted_columns': tuple(self.columns_to_delete),
             'remaining_columns_count': len(self.processed_data.columns) if self.processed_data is not None else 0,
             'remaining_columns': self.processed_data.columns.tolist() if self.processed_data is not None else [],
             'data_rows_count': len(self.processed_data) if self.processed_data is not None else 0,
-            'processing_history': self.processing_history.copy()
+            'processing_history': tuple(self.processing_history)
         }
         
         return summary
@@ -246,7 +319,7 @@ class DataProcessor:
         Returns:
             Optional[pd.DataFrame]: 处理后的数据，如果没有处理则返回None
         """
-        return self.processed_data.copy() if self.processed_data is not None else None
+        return self.processed_data
     
     def get_original_data(self) -> Optional[pd.DataFrame]:
         """
@@ -255,15 +328,17 @@ class DataProcessor:
         Returns:
             Optional[pd.DataFrame]: 原始数据
         """
-        return self.original_data.copy() if self.original_data is not None else None
+        return self.original_data
     
     def reset(self):
         """
         重置处理器状态
         """
-        self.processed_data = self.original_data.copy() if self.original_data is not None else None
+        self.processed_data = self.original_data
         self.columns_to_delete = []
         self.processing_history = []
+        self._numeric_cols_cache.clear()
+        self._summary_idx_cache.clear()
         
         logger.info("数据处理器已重置")
     
@@ -277,16 +352,24 @@ class DataProcessor:
         if self.original_data is None:
             return {}
         
+        df = self.original_data
+        
+        # 一次性统计各列的非空数、空值数和数据类型
+        counts = df.count()
+        nulls = df.isnull().sum()
+        dtypes = df.dtypes.astype(str)
+        delete_set = set(self.columns_to_delete)
+        
         columns_info = []
-        for i, col in enumerate(self.original_data.columns):
+        for i, col in enumerate(df.columns):
             col_info = {
                 'index': i,
-                'excel_column': self._get_excel_column_name(i),
+                'excel_column': _get_excel_column_name(i),
                 'name': col,
-                'data_type': str(self.original_data[col].dtype),
-                'non_null_count': self.original_data[col].count(),
-                'null_count': self.original_data[col].isnull().sum(),
-                'is_selected_for_deletion': col in self.columns_to_delete
+                'data_type': dtypes.iat[i],
+                'non_null_count': int(counts.iat[i]),
+                'null_count': int(nulls.iat[i]),
+                'is_selected_for_deletion': col in delete_set
             }
             columns_info.append(col_info)
         
@@ -295,22 +378,6 @@ class DataProcessor:
             'columns_info': columns_info
         }
     
-    def _get_excel_column_name(self, index: int) -> str:
-        """
-        将列索引转换为Excel列名（A, B, C, ...）
-        
-        Args:
-            index: 列索引（从0开始）
-        
-        Returns:
-            str: Excel列名
-        """
-        result = ""
-        while index >= 0:
-            result = chr(65 + (index % 26)) + result
-            index = index // 26 - 1
-        return result
-    
     def apply_template(self, template_columns: List[str]) -> bool:
         """
         应用模板（设置要删除的列）
@@ -327,25 +394,34 @@ class DataProcessor:
                 return False
             
             # 使用模糊匹配找到对应的列
-            available_columns = self.original_data.columns.tolist()
+            columns = self.original_data.columns
+            column_names = columns.astype(str)
+            available_set = set(columns)
             matched_columns = []
             
             for template_col in template_columns:
                 # 精确匹配
-                if template_col in available_columns:
+                if template_col in available_set:
                     matched_columns.append(template_col)
-                else:
-                    # 模糊匹配（包含关键词）
-                    for available_col in available_columns:
-                        if template_col in available_col or available_col in template_col:
-                            if available_col not in matched_columns:
-                                matched_columns.append(available_col)
-                            break
+                    continue
+                
+                # 模糊匹配（列名包含关键词或关键词包含列名），取第一个匹配列；
+                # "关键词包含列名"即列名是关键词的子串，用子串集合做isin查找，避免逐列调用Python函数
+                template_substrings = {template_col[i:j] for i in range(len(template_col) + 1)
+                                       for j in range(i, len(template_col) + 1)}
+                mask = (np.asarray(column_names.str.contains(template_col, regex=False))
+                        | column_names.isin(template_substrings))
+                if mask.any():
+                    matched_columns.append(columns[mask.argmax()])
+            
+            # 去重并保持顺序
+            matched_columns = list(dict.fromkeys(matched_columns))
             
             self.columns_to_delete = matched_columns
             
-            logger.info(f"应用模板成功: 匹配到 {len(matched_columns)} 个列")
-            logger.info(f"匹配的列: {', '.join(matched_columns)}")
+            logger.info("应用模板成功: 匹配到 %s 个列", len(matched_columns))
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("匹配的列: %s", ', '.join(map(str, matched_columns)))
             
             return True
             
@@ -370,21 +446,23 @@ class DataProcessor:
             
             # 验证列是否存在且为数值类型
             valid_columns = []
-            available_columns = self.original_data.columns.tolist()
+            available_columns = set(self.original_data.columns)
+            numeric_columns = set(self._numeric_cols(self.original_data))
             
             for col in columns:
                 if col in available_columns:
-                    if pd.api.types.is_numeric_dtype(self.original_data[col]):
+                    if col in numeric_columns:
                         valid_columns.append(col)
                     else:
-                        logger.warning(f"列 {col} 不是数值类型，跳过")
+                        logger.warning("列 %s 不是数值类型，跳过", col)
                 else:
-                    logger.warning(f"列 {col} 不存在，跳过")
+                    logger.warning("列 %s 不存在，跳过", col)
             
             self.columns_to_recalculate = valid_columns
             
-            logger.info(f"设置需要重新计算的列: {len(valid_columns)} 个")
-            logger.info(f"重新计算的列: {', '.join(valid_columns)}")
+            logger.info("设置需要重新计算的列: %s 个", len(valid_columns))
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("重新计算的列: %s", ', '.join(map(str, valid_columns)))
             
             return True
             
@@ -417,55 +495,50 @@ class DataProcessor:
                 return {'success': False, 'error': '数据为空'}
             
             # 识别数值列
-            numeric_columns = target_data.select_dtypes(include=['number']).columns.tolist()
+            numeric_columns = self._numeric_cols(target_data)
             
             if not numeric_columns:
                 logger.info("未找到数值列")
                 return {'success': True, 'sums': {}, 'total_numeric_columns': 0}
             
+            # 一次性计算所有数值列的合计与有效数据数
+            numeric_data = target_data.loc[:, numeric_columns]
+            sums = numeric_data.sum()
+            valid_counts = numeric_data.count()
+            total_count = len(numeric_data)
+            
             # 计算每列的统计信息
             column_stats = {}
+            price_tax_total_col = None  # 第一个有效的合计列（如价税合计）
             
-            for col in numeric_columns:
-                try:
-                    # 获取列数据
-                    col_data = target_data[col]
+            for col, col_sum, valid_count in zip(numeric_columns, sums, valid_counts):
+                if valid_count > 0:
+                    if price_tax_total_col is None and isinstance(col, str) and '合计' in col:
+                        price_tax_total_col = col
                     
-                    # 计算统计信息
-                    total_count = len(col_data)
-                    null_count = col_data.isnull().sum()
-                    valid_count = total_count - null_count
+                    # 格式化显示（不使用千分位分隔符）
+                    formatted_sum = f"{col_sum:.2f}"
                     
-                    if valid_count > 0:
-                        # 计算求和
-                        col_sum = col_data.sum()
-                        
-                        # 格式化显示（不使用千分位分隔符）
-                        formatted_sum = f"{col_sum:.2f}"
-                        
-                        column_stats[col] = {
-                            'sum': col_sum,
-                            'formatted_sum': formatted_sum,
-                            'total_count': total_count,
-                            'valid_count': valid_count,
-                            'null_count': null_count,
-                            'average': col_sum / valid_count if valid_count > 0 else 0
-                        }
-                        
-                        logger.debug(f"列 {col} 统计: 合计={formatted_sum}, 有效数据={valid_count}/{total_count}")
+                    column_stats[col] = {
+                        'sum': col_sum,
+                        'formatted_sum': formatted_sum,
+                        'total_count': total_count,
+                        'valid_count': valid_count,
+                        'null_count': total_count - valid_count,
+                        'average': col_sum / valid_count
+                    }
                     
-                except Exception as e:
-                    logger.warning(f"计算列 {col} 统计失败: {e}")
-                    continue
+                    logger.debug("列 %s 统计: 合计=%s, 有效数据=%s/%s", col, formatted_sum, valid_count, total_count)
             
             result = {
                 'success': True,
                 'sums': column_stats,
                 'total_numeric_columns': len(numeric_columns),
-                'processed_columns': len(column_stats)
+                'processed_columns': len(column_stats),
+                'price_tax_total_column': price_tax_total_col
             }
             
-            logger.info(f"数值列统计完成: 共 {len(numeric_columns)} 个数值列，成功处理 {len(column_stats)} 个")
+            logger.info("数值列统计完成: 共 %s 个数值列，成功处理 %s 个", len(numeric_columns), len(column_stats))
             return result
             
         except Exception as e:
@@ -498,7 +571,7 @@ class DataProcessor:
             col_data = target_data[column_name]
             
             # 检查是否为数值列
-            if not pd.api.types.is_numeric_dtype(col_data):
+            if column_name not in self._numeric_cols(target_data):
                 return {'success': False, 'error': f'列 {column_name} 不是数值类型'}
             
             # 计算统计信息
@@ -525,7 +598,7 @@ class DataProcessor:
                 'average': col_sum / valid_count
             }
             
-            logger.info(f"列 {column_name} 求和: {formatted_sum}")
+            logger.info("列 %s 求和: %s", column_name, formatted_sum)
             return result
             
         except Exception as e:
@@ -555,27 +628,16 @@ class DataProcessor:
                 return {'success': False, 'error': '数据为空'}
             
             # 查找包含"合计"关键词的行
-            summary_row_index = None
-            summary_keywords = ['合计', '总计', '小计', 'Total', 'Sum']
-            
-            for index, row in target_data.iterrows():
-                # 检查每一行的所有列是否包含合计关键词
-                for col in target_data.columns:
-                    cell_value = str(row[col]).strip()
-                    if any(keyword in cell_value for keyword in summary_keywords):
-                        summary_row_index = index
-                        break
-                if summary_row_index is not None:
-                    break
+            summary_row_index = self._find_summary_index(target_data)
             
             if summary_row_index is not None:
                 result = {
                     'success': True,
                     'summary_row_index': summary_row_index,
-                    'summary_row_data': target_data.iloc[summary_row_index].to_dict(),
+                    'summary_row_data': target_data.loc[summary_row_index].to_dict(),
                     'has_summary_row': True
                 }
-                logger.info(f"找到合计行，位置: 第{summary_row_index + 1}行")
+                logger.info("找到合计行，位置: 第%s行", summary_row_index + 1)
             else:
                 result = {
                     'success': True,
@@ -608,45 +670,43 @@ class DataProcessor:
                 if self.processed_data is None:
                     logger.error("没有可用的数据")
                     return False
-                target_data = self.processed_data.copy()
+                source_data = self.processed_data
             else:
-                target_data = data.copy()
+                source_data = data
             
-            # 识别合计行
-            summary_info = self.identify_summary_row(target_data)
+            # 识别合计行（在拷贝前识别，以复用同一对象的缓存结果）
+            summary_info = self.identify_summary_row(source_data)
             if not summary_info['success'] or not summary_info['has_summary_row']:
                 logger.warning("未找到合计行，跳过更新")
                 return True  # 没有合计行不算错误
             
             summary_row_index = summary_info['summary_row_index']
+            if data is None:
+                # processed_data可能与原始数据、跨表数据或读取器缓存为同一对象，先拷贝再原地更新
+                target_data = self.processed_data.copy()
+                self.processed_data = target_data
+            else:
+                target_data = source_data.copy()
             
-            # 获取数据行（排除合计行）
-            data_rows = target_data.drop(summary_row_index)
-            
-            # 重新计算指定列的合计
-            updated_values = {}
+            # 筛选存在且为数值类型的待计算列
+            numeric_columns = set(self._numeric_cols(source_data))
+            cols = []
             for col_name in columns_to_recalculate:
-                if col_name in target_data.columns:
-                    # 检查是否为数值列
-                    if pd.api.types.is_numeric_dtype(data_rows[col_name]):
-                        # 计算合计（排除空值）
-                        col_sum = data_rows[col_name].sum()
-                        updated_values[col_name] = col_sum
-                        logger.info(f"重新计算列 {col_name} 合计: {col_sum}")
-                    else:
-                        logger.warning(f"列 {col_name} 不是数值类型，跳过计算")
+                if col_name not in target_data.columns:
+                    logger.warning("列 %s 不存在，跳过计算", col_name)
+                elif col_name not in numeric_columns:
+                    logger.warning("列 %s 不是数值类型，跳过计算", col_name)
                 else:
-                    logger.warning(f"列 {col_name} 不存在，跳过计算")
+                    cols.append(col_name)
             
-            # 更新合计行的值
-            for col_name, new_value in updated_values.items():
-                target_data.at[summary_row_index, col_name] = new_value
-            
-            # 更新processed_data
-            if data is None:
-                self.processed_data = target_data
+            if cols:
+                # 一次性计算所有列的合计（排除合计行与空值），并整行写回
+                sums = target_data.loc[target_data.index != summary_row_index, cols].sum(axis=0)
+                target_data.loc[summary_row_index, cols] = sums.values
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("重新计算合计: %s", sums.to_dict())
             
-            logger.info(f"成功更新合计行，重新计算了 {len(updated_values)} 列")
+            logger.info("成功更新合计行，重新计算了 %s 列", len(cols))
             return True
             
         except Exception as e:
@@ -675,25 +735,114 @@ class DataProcessor:
             if target_data.empty:
                 return []
             
-            # 识别合计行
-            summary_info = self.identify_summary_row(target_data)
+            # 获取数值列（排除合计行不会改变列类型，无需先识别合计行）
+            numeric_columns = list(self._numeric_cols(target_data))
             
-            # 获取数据行（如果有合计行则排除）
-            if summary_info['success'] and summary_info['has_summary_row']:
-                data_rows = target_data.drop(summary_info['summary_row_index'])
-            else:
-                data_rows = target_data
-            
-            # 获取数值列
-            numeric_columns = data_rows.select_dtypes(include=['number']).columns.tolist()
-            
-            logger.info(f"找到 {len(numeric_columns)} 个可用于合计的数值列")
+            logger.info("找到 %s 个可用于合计的数值列", len(numeric_columns))
             return numeric_columns
             
         except Exception as e:
             logger.error(f"获取数值列失败: {e}")
             return []
     
+    def _cached_by_frame(self, cache: Dict, df: pd.DataFrame, compute: Callable[[pd.DataFrame], Any]) -> Any:
+        """
+        按DataFrame对象缓存计算结果
+        
+        Args:
+            cache: 缓存字典，键为(id(df), shape)
+            df: 要分析的数据
+            compute: 缓存未命中时的计算函数
+        
+        Returns:
+            Any: 计算结果，调用方不应修改
+        """
+        key = (id(df), df.shape)
+        cached = cache.get(key)
+        if cached is not None and cached[0]() is df:
+            return cached[1]
+        
+        # 清理已被回收的DataFrame对应的缓存项，避免id复用导致误命中
+        for stale_key in [k for k, (ref, _) in cache.items() if ref() is None]:
+            del cache[stale_key]
+        
+        value = compute(df)
+        cache[key] = (weakref.ref(df), value)
+        return value
+    
+    def _numeric_cols(self, df: pd.DataFrame) -> List[str]:
+        """
+        获取数值列名列表（按DataFrame对象缓存）
+        
+        Args:
+            df: 要分析的数据
+        
+        Returns:
+            List[str]: 数值列名列表，调用方不应修改
+        """
+        return self._cached_by_frame(
+            self._numeric_cols_cache, df,
+            lambda frame: frame.select_dtypes(include=['number']).columns.tolist()
+        )
+    
+    def _find_summary_index(self, df: pd.DataFrame) -> Optional[Any]:
+        """
+        查找合计行的索引（按DataFrame对象缓存）
+        
+        Args:
+            df: 要分析的数据
+        
+        Returns:
+            Optional[Any]: 合计行索引，未找到则返回None
+        """
+        return self._cached_by_frame(self._summary_idx_cache, df, self._scan_summary_index)
+    
+    def _scan_summary_index(self, df: pd.DataFrame) -> Optional[Any]:
+        """
+        扫描包含合计关键词的第一行
+        
+        Args:
+            df: 要分析的数据
+        
+        Returns:
+            Optional[Any]: 合计行索引，未找到则返回None
+        """
+        # 关键词只会出现在文本类列中，跳过数值列避免无谓的字符串转换
+        numeric_columns = set(self._numeric_cols(df))
+        text_columns = [col for col in df.columns if col not in numeric_columns]
+        
+        # 合计行通常位于表头或表尾，先检查首尾各3行，未命中再扫描中间部分
+        n = len(df)
+        edge = 3
+        for part in (df.iloc[:edge], df.iloc[max(edge, n - edge):], df.iloc[edge:max(edge, n - edge)]):
+            summary_row_index = self._first_summary_match(part, text_columns)
+            if summary_row_index is not None:
+                return summary_row_index
+        
+        return None
+    
+    @staticmethod
+    def _first_summary_match(df: pd.DataFrame, text_columns: List[Any]) -> Optional[Any]:
+        """
+        在给定行范围内查找第一个包含合计关键词的行
+        
+        Args:
+            df: 要扫描的数据片段
+            text_columns: 需要扫描的文本列
+        
+        Returns:
+            Optional[Any]: 合计行索引，未找到则返回None
+        """
+        if df.empty:
+            return None
+        
+        # 按列向量化匹配关键词，合并为行掩码
+        mask = pd.Series(False, index=df.index)
+        for col in text_columns:
+            mask |= df[col].astype(str).str.contains(_SUMMARY_PATTERN, regex=True, na=False)
+        
+        return mask.idxmax() if mask.any() else None
+    
     def load_cross_sheet_data(self, sheet_data: Dict[str, pd.DataFrame]) -> bool:
         """
         加载跨工作表数据用于关联
@@ -706,7 +855,8 @@ class DataProcessor:
         """
         try:
             self.cross_sheet_data = sheet_data.copy()
-            logger.info(f"加载跨工作表数据成功，共 {len(sheet_data)} 个工作表")
+            self._detail_indexes.clear()
+            logger.info("加载跨工作表数据成功，共 %s 个工作表", len(sheet_data))
             return True
         except Exception as e:
             logger.error(f"加载跨工作表数据失败: {e}")
@@ -745,21 +895,9 @@ class DataProcessor:
             detail_df = self.cross_sheet_data[detail_sheet_name]
             
             # 智能选择关联字段
+            invoice_column = self._resolve_invoice_column(invoice_df, invoice_column)
             if invoice_column is None:
-                # 检查发票基础信息表中的可用字段
-                available_invoice_columns = []
-                if '发票号码' in invoice_df.columns:
-                    available_invoice_columns.append('发票号码')
-                if '数电发票号码' in invoice_df.columns:
-                    available_invoice_columns.append('数电发票号码')
-                
-                if not available_invoice_columns:
-                    logger.error("发票基础信息表中未找到发票号码相关字段")
-                    return {}
-                
-                # 优先使用数电发票号码，如果不存在则使用发票号码
-                invoice_column = '数电发票号码' if '数电发票号码' in available_invoice_columns else '发票号码'
-                logger.info(f"自动选择关联字段: {invoice_column}")
+                return {}
             
             # 检查必要的列是否存在
             if invoice_column not in invoice_df.columns:
@@ -774,23 +912,12 @@ class DataProcessor:
                 logger.error(f"信息汇总表中未找到列: {goods_column}")
                 return {}
             
-            # 提取发票基础信息表中的发票号码
-            invoice_numbers = invoice_df[invoice_column].dropna().unique()
-            
             # 构建发票号码到货物名称的映射（只取第一条）
-            invoice_goods_map = {}
-            
-            for invoice_num in invoice_numbers:
-                # 在信息汇总表中查找对应的货物名称
-                matching_rows = detail_df[detail_df[invoice_column] == invoice_num]
-                
-                if not matching_rows.empty:
-                    # 只取第一条匹配记录的货物名称
-                    first_goods_name = matching_rows[goods_column].iloc[0]
-                    if pd.notna(first_goods_name) and str(first_goods_name).strip():
-                        invoice_goods_map[str(invoice_num)] = str(first_goods_name).strip()
+            invoice_keys = self._invoice_join_keys(invoice_df, invoice_column)
+            matched_goods = self._match_first_goods(invoice_keys, detail_sheet_name, invoice_column, goods_column)
+            invoice_goods_map = dict(zip(matched_goods.index, matched_goods))
             
-            logger.info(f"成功提取 {len(invoice_goods_map)} 个发票的货物名称信息（使用字段: {invoice_column}）")
+            logger.info("成功提取 %s 个发票的货物名称信息（使用字段: %s）", len(invoice_goods_map), invoice_column)
             return invoice_goods_map
             
         except Exception as e:
@@ -804,6 +931,9 @@ class DataProcessor:
         """
         将货物名称添加到发票基础信息表的最后一列（智能字段选择）
         
+        添加后的新DataFrame只生成一份，cross_sheet_data、original_data和processed_data
+        直接引用同一对象，不再各自拷贝
+        
         Args:
             invoice_sheet_name: 发票基础信息表名称
             invoice_goods_map: 发票号码到货物名称的映射
@@ -818,69 +948,266 @@ class DataProcessor:
                 logger.error(f"未找到发票基础信息表: {invoice_sheet_name}")
                 return False
             
-            invoice_df = self.cross_sheet_data[invoice_sheet_name].copy()
+            invoice_df = self.cross_sheet_data[invoice_sheet_name]
             
             # 智能选择关联字段（与extract_goods_names_by_invoice保持一致）
+            invoice_column = self._resolve_invoice_column(invoice_df, invoice_column)
             if invoice_column is None:
-                # 检查发票基础信息表中的可用字段
-                available_invoice_columns = []
-                if '发票号码' in invoice_df.columns:
-                    available_invoice_columns.append('发票号码')
-                if '数电发票号码' in invoice_df.columns:
-                    available_invoice_columns.append('数电发票号码')
-                
-                if not available_invoice_columns:
-                    logger.error("发票基础信息表中未找到发票号码相关字段")
-                    return False
-                
-                # 优先使用数电发票号码，如果不存在则使用发票号码
-                invoice_column = '数电发票号码' if '数电发票号码' in available_invoice_columns else '发票号码'
-                logger.info(f"自动选择关联字段: {invoice_column}")
+                return False
             
             # 检查发票号码列是否存在
             if invoice_column not in invoice_df.columns:
                 logger.error(f"发票基础信息表中未找到列: {invoice_column}")
                 return False
             
-            # 创建新的货物名称列
-            goods_names_list = []
-            
-            for _, row in invoice_df.iterrows():
-                invoice_num = str(row[invoice_column]) if pd.notna(row[invoice_column]) else ''
-                
-                if invoice_num in invoice_goods_map:
-                    # 直接使用映射中的货物名称（已经是第一条）
-                    goods_names_list.append(invoice_goods_map[invoice_num])
-                else:
-                    goods_names_list.append('')  # 未找到匹配的货物名称
+            # 创建新的货物名称列（按发票号码映射，未匹配的为空字符串）
+            invoice_keys = self._invoice_join_keys(invoice_df, invoice_column)
             
-            # 添加新列到DataFrame的最后
-            invoice_df[new_column_name] = goods_names_list
-            
-            # 更新存储的数据
-            self.cross_sheet_data[invoice_sheet_name] = invoice_df
-            
-            # 更新主数据源，确保后续处理能使用包含货物名称的数据
-            if self.original_data is not None and len(self.original_data) == len(invoice_df):
-                self.original_data = invoice_df.copy()
-                logger.info("已更新原始数据源，包含货物名称列")
+            # 添加新列到DataFrame的最后（生成新对象，不影响调用方传入的工作表数据）
+            invoice_df = self._attach_columns(
+                invoice_df, {new_column_name: invoice_keys.map(invoice_goods_map).fillna('')}
+            )
             
-            # 如果当前处理的数据是发票基础信息表，也更新processed_data
-            if self.processed_data is not None and len(self.processed_data) == len(invoice_df):
-                self.processed_data = invoice_df.copy()
-                logger.info("已更新处理数据，包含货物名称列")
+            self._store_invoice_sheet(invoice_sheet_name, invoice_df)
             
-            logger.info(f"成功添加货物名称列到 {invoice_sheet_name}，共 {len(goods_names_list)} 行数据（使用字段: {invoice_column}）")
+            logger.info("成功添加货物名称列到 %s，共 %s 行数据（使用字段: %s）", invoice_sheet_name, len(invoice_df), invoice_column)
             return True
             
         except Exception as e:
             logger.error(f"添加货物名称列失败: {e}")
             return False
     
+    def _resolve_invoice_column(self, invoice_df: pd.DataFrame, invoice_column: Optional[str]) -> Optional[str]:
+        """
+        智能选择发票号码关联字段
+        
+        Args:
+            invoice_df: 发票基础信息表数据
+            invoice_column: 指定的发票号码列名（为None时自动选择）
+            
+        Returns:
+            Optional[str]: 关联字段名，未找到可用字段时返回None
+        """
+        if invoice_column is not None:
+            return invoice_column
+        
+        # 优先使用数电发票号码，如果不存在则使用发票号码
+        for candidate in ('数电发票号码', '发票号码'):
+            if candidate in invoice_df.columns:
+                logger.info("自动选择关联字段: %s", candidate)
+                return candidate
+        
+        logger.error("发票基础信息表中未找到发票号码相关字段")
+        return None
+    
+    def _get_detail_index(self, detail_sheet_name: str, invoice_column: str) -> pd.DataFrame:
+        """
+        获取明细表按发票号码去重后的首行索引（按明细表和关联字段缓存）
+        
+        发票号码先规范化（去除首尾空白）再去重，与发票基础信息表一侧的处理一致
+        
+        Args:
+            detail_sheet_name: 发票明细表名称
+            invoice_column: 发票号码列名
+            
+        Returns:
+            pd.DataFrame: 以发票号码为索引、每个发票号码只保留第一条记录的数据
+        """
+        index_key = (detail_sheet_name, invoice_column)
+        detail_index = self._detail_indexes.get(index_key)
+        if detail_index is None:
+            detail_df = self.cross_sheet_data[detail_sheet_name]
+            detail_keys = _as_join_key(self._normalize_key_series(detail_df[invoice_column]))
+            detail_index = (
+                detail_df.assign(**{invoice_column: detail_keys})[detail_keys.ne('').to_numpy()]
+                .drop_duplicates(subset=invoice_column, keep='first')
+                .set_index(invoice_column)
+            )
+            self._detail_indexes[index_key] = detail_index
+        return detail_index
+    
+    def _invoice_join_keys(self, invoice_df: pd.DataFrame, invoice_column: str) -> pd.Series:
+        """
+        生成发票基础信息表的关联键（与明细表索引使用相同的规范化和类型）
+        
+        Args:
+            invoice_df: 发票基础信息表数据
+            invoice_column: 发票号码列名
+            
+        Returns:
+            pd.Series: 与发票表逐行对应的规范化发票号码
+        """
+        return _as_join_key(self._normalize_key_series(invoice_df[invoice_column]))
+    
+    def _match_first_goods(self, invoice_keys: pd.Series, detail_sheet_name: str,
+                           invoice_column: str, goods_column: str) -> pd.Series:
+        """
+        匹配发票基础信息表中每个发票号码在明细表中的第一条货物名称
+        
+        Args:
+            invoice_keys: 发票基础信息表的关联键（由_invoice_join_keys生成）
+            detail_sheet_name: 发票明细表名称
+            invoice_column: 发票号码列名
+            goods_column: 货物名称列名
+            
+        Returns:
+            pd.Series: 以规范化发票号码为索引的非空货物名称，每个发票号码一条
+        """
+        invoice_numbers = invoice_keys.unique()
+        invoice_numbers = invoice_numbers[invoice_numbers != '']
+        
+        # 信息汇总表中每个发票号码只取第一条记录
+        first_goods = self._get_detail_index(detail_sheet_name, invoice_column)[goods_column]
+        
+        matched_goods = first_goods.reindex(invoice_numbers).dropna().astype(str).str.strip()
+        return matched_goods[matched_goods != '']
+    
+    @staticmethod
+    def _normalize_key_series(keys: pd.Series) -> pd.Series:
+        """
+        规范化关联字段（转为字符串类型、去除首尾空白，空值转为空字符串）
+        
+        整数值的浮点数先转为整数，避免含空值而被读成浮点的发票号码（123.0）
+        与明细表中的整数发票号码（123）无法匹配
+        
+        Args:
+            keys: 发票号码数据
+            
+        Returns:
+            pd.Series: 规范化后的字符串发票号码
+        """
+        if pd.api.types.is_float_dtype(keys) or keys.dtype == object:
+            values = keys.to_numpy(dtype=object, copy=True)
+            if pd.api.types.is_float_dtype(keys):
+                floats = keys.to_numpy(dtype=float, na_value=np.nan)
+            else:
+                is_float = np.fromiter((isinstance(v, float) for v in values), dtype=bool, count=len(values))
+                floats = np.where(is_float, values, np.nan).astype(float)
+            # 只转换能精确表示的整数值（超出2^53的浮点数已丢失精度）
+            with np.errstate(invalid='ignore'):
+                integral = np.isfinite(floats) & (np.mod(floats, 1) == 0) & (np.abs(floats) < 2 ** 53)
+            if integral.any():
+                values[integral] = floats[integral].astype(np.int64)
+                keys = pd.Series(values, index=keys.index, dtype=object)
+        return keys.astype('string').str.strip().fillna('')
+    
+    @staticmethod
+    def _attach_columns(df: pd.DataFrame, new_columns: Dict[str, Any]) -> pd.DataFrame:
+        """
+        一次性将多个新列追加到DataFrame末尾
+        
+        Args:
+            df: 原始数据
+            new_columns: 列名到列数据的映射，已存在的同名列原位替换（保持列位置）
+            
+        Returns:
+            pd.DataFrame: 追加新列后的新DataFrame
+        """
+        existing = {col: data for col, data in new_columns.items() if col in df.columns}
+        appended = {col: data for col, data in new_columns.items() if col not in existing}
+        if existing:
+            df = df.assign(**existing)
+        if not appended:
+            return df if existing else df.copy()
+        return pd.concat([df, pd.DataFrame(appended, index=df.index)], axis=1)
+    
+    def _store_invoice_sheet(self, invoice_sheet_name: str, invoice_df: pd.DataFrame):
+        """
+        保存添加货物名称后的发票基础信息表，并同步主数据源
+        
+        Args:
+            invoice_sheet_name: 发票基础信息表名称
+            invoice_df: 添加货物名称列后的数据
+        """
+        # 更新存储的数据，并清除该表相关的明细索引缓存
+        self.cross_sheet_data[invoice_sheet_name] = invoice_df
+        for index_key in [k for k in self._detail_indexes if k[0] == invoice_sheet_name]:
+            del self._detail_indexes[index_key]
+        
+        # 更新主数据源，确保后续处理能使用包含货物名称的数据
+        # 原始数据与处理数据直接引用同一对象，原地修改前需先拷贝（见update_summary_row）
+        # 已是同一对象时无需更新
+        if (self.original_data is not None and self.original_data is not invoice_df
+                and len(self.original_data) == len(invoice_df)):
+            self.original_data = invoice_df
+            logger.info("已更新原始数据源，包含货物名称列")
+        
+        # 如果当前处理的数据是发票基础信息表，也更新processed_data
+        if (self.processed_data is not None and self.processed_data is not invoice_df
+                and len(self.processed_data) == len(invoice_df)):
+            self.processed_data = invoice_df
+            logger.info("已更新处理数据，包含货物名称列")
+    
+    def _associate_goods_by_merge(self, invoice_sheet_name: str, detail_sheet_name: str,
+                                  invoice_column: Optional[str], goods_column: str,
+                                  new_column_name: str) -> Dict[str, Any]:
+        """
+        使用merge一次性将明细表中的货物名称关联到发票基础信息表
+        
+        Args:
+            invoice_sheet_name: 发票基础信息表名称
+            detail_sheet_name: 发票明细表名称（信息汇总表）
+            invoice_column: 发票号码列名（如果为None则自动选择）
+            goods_column: 货物名称列名
+            new_column_name: 新增列的名称
+            
+        Returns:
+            Dict: 包含是否成功及匹配发票数的字典
+        """
+        if not self.cross_sheet_data:
+            logger.error("未加载跨工作表数据")
+            return {'success': False, 'matched_invoices': 0}
+        
+        if invoice_sheet_name not in self.cross_sheet_data:
+            logger.error(f"未找到发票基础信息表: {invoice_sheet_name}")
+            return {'success': False, 'matched_invoices': 0}
+        
+        if detail_sheet_name not in self.cross_sheet_data:
+            logger.error(f"未找到信息汇总表: {detail_sheet_name}")
+            return {'success': False, 'matched_invoices': 0}
+        
+        invoice_df = self.cross_sheet_data[invoice_sheet_name]
+        detail_df = self.cross_sheet_data[detail_sheet_name]
+        
+        invoice_column = self._resolve_invoice_column(invoice_df, invoice_column)
+        if invoice_column is None:
+            return {'success': False, 'matched_invoices': 0}
+        
+        for df, sheet_label, col in ((invoice_df, '发票基础信息表', invoice_column),
+                                     (detail_df, '信息汇总表', invoice_column),
+                                     (detail_df, '信息汇总表', goods_column)):
+            if col not in df.columns:
+                logger.error(f"{sheet_label}中未找到列: {col}")
+                return {'success': False, 'matched_invoices': 0}
+        
+        # 每个发票号码在明细表中的第一条非空货物名称
+        invoice_keys = self._invoice_join_keys(invoice_df, invoice_column)
+        matched_goods = self._match_first_goods(invoice_keys, detail_sheet_name, invoice_column, goods_column)
+        goods_table = pd.DataFrame({
+            '_key': matched_goods.index,
+            '_goods': matched_goods.to_numpy()
+        })
+        
+        # 以规范化的发票号码左连接货物名称，保持发票表的行顺序
+        merged = pd.DataFrame({'_key': invoice_keys.reset_index(drop=True)}).merge(
+            goods_table, on='_key', how='left', validate='m:1'
+        )
+        
+        matched_invoices = len(matched_goods)
+        if matched_invoices == 0:
+            return {'success': True, 'matched_invoices': 0}
+        
+        invoice_df = self._attach_columns(invoice_df, {new_column_name: merged['_goods'].fillna('').to_numpy()})
+        self._store_invoice_sheet(invoice_sheet_name, invoice_df)
+        
+        logger.info("成功关联 %s 个发票的货物名称到 %s（使用字段: %s）", matched_invoices, invoice_sheet_name, invoice_column)
+        return {'success': True, 'matched_invoices': matched_invoices}
+    
     def process_cross_sheet_association(self, invoice_sheet_name: str, detail_sheet_name: str,
                                       invoice_column: str = None,
                                       goods_column: str = '货物或应税劳务名称',
-                                      new_column_name: str = '货物或应税劳务名称') -> bool:
+                                      new_column_name: str = '货物或应税劳务名称',
+                                      use_merge: bool = True) -> bool:
         """
         执行跨工作表数据关联的完整流程（智能字段选择）
         
@@ -890,24 +1217,38 @@ class DataProcessor:
             invoice_column: 发票号码列名（如果为None则自动选择）
             goods_column: 货物名称列名
             new_column_name: 新增列的名称
+            use_merge: 是否使用merge一次性关联；为False时使用原有的映射字典流程
             
         Returns:
             bool: 操作是否成功
         """
         try:
-            # 1. 提取货物名称映射（使用智能字段选择）
-            invoice_goods_map = self.extract_goods_names_by_invoice(
-                invoice_sheet_name, detail_sheet_name, invoice_column, goods_column
-            )
-            
-            if not invoice_goods_map:
-                logger.warning("未找到任何发票号码匹配的货物名称")
-                return False
-            
-            # 2. 将货物名称添加到发票基础信息表（使用智能字段选择）
-            success = self.add_goods_names_to_invoice_sheet(
-                invoice_sheet_name, invoice_goods_map, invoice_column, new_column_name
-            )
+            if use_merge:
+                result = self._associate_goods_by_merge(
+                    invoice_sheet_name, detail_sheet_name, invoice_column, goods_column, new_column_name
+                )
+                if not result['success']:
+                    return False
+                matched_invoices = result['matched_invoices']
+                if matched_invoices == 0:
+                    logger.warning("未找到任何发票号码匹配的货物名称")
+                    return False
+                success = True
+            else:
+                # 1. 提取货物名称映射（使用智能字段选择）
+                invoice_goods_map = self.extract_goods_names_by_invoice(
+                    invoice_sheet_name, detail_sheet_name, invoice_column, goods_column
+                )
+                
+                if not invoice_goods_map:
+                    logger.warning("未找到任何发票号码匹配的货物名称")
+                    return False
+                
+                # 2. 将货物名称添加到发票基础信息表（使用智能字段选择）
+                success = self.add_goods_names_to_invoice_sheet(
+                    invoice_sheet_name, invoice_goods_map, invoice_column, new_column_name
+                )
+                matched_invoices = len(invoice_goods_map)
             
             if success:
                 logger.info("跨工作表数据关联处理完成")
@@ -916,7 +1257,7 @@ class DataProcessor:
                     'operation': 'cross_sheet_association',
                     'invoice_sheet': invoice_sheet_name,
                     'detail_sheet': detail_sheet_name,
-                    'matched_invoices': len(invoice_goods_map)
+                    'matched_invoices': matched_invoices
                 })
             
             return success
@@ -6,11 +6,43 @@ Excel文件读取器
 
 import pandas as pd
 import os
+from openpyxl import Workbook, load_workbook
 from typing import Optional, Dict, List, Any
 from src.utils.logger import get_logger
 
 logger = get_logger("ExcelReader")
 
+# 优先使用基于Rust的calamine引擎读取xlsx（需要pandas>=2.2及python-calamine）
+try:
+    import python_calamine  # noqa: F401
+    _HAS_CALAMINE = tuple(int(x) for x in pd.__version__.split('.')[:2]) >= (2, 2)
+except ImportError:
+    _HAS_CALAMINE = False
+
+# 目标工作表关键词及优先级（分值越高越优先）
+_TARGET_SHEET_PRIORITIES = (("发票基础信息", 4), ("发票信息", 3), ("基础信息", 2))
+
+# 按维度信息统计行数时，向前检查末尾空行的最大行数
+_TRAILING_SCAN_ROWS = 200
+
+def _sum_numeric_values(values: List[Any]) -> Optional[tuple]:
+    """
+    对一列非空值求和，规则与pandas读取时的数值类型推断一致
+    
+    Args:
+        values: 非空单元格值列表
+        
+    Returns:
+        Optional[tuple]: (合计, 有效数据数)，存在无法解析为数字的值、含布尔值或没有数据时返回None
+    """
+    if not values or any(value.__class__ is bool for value in values):
+        return None
+    try:
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='raise')
+    except (ValueError, TypeError):
+        return None
+    return float(numbers.sum()), len(values)
+
 class ExcelReader:
     """
     Excel文件读取器类
@@ -22,13 +54,18 @@ class ExcelReader:
         self.excel_file = None
         self.worksheets_info = {}
         self.current_worksheet = None
+        self._sheet_names = []  # 工作表名称列表
+        self._engine = None  # 当前文件使用的读取引擎
+        self._sheet_cache: Dict[str, pd.DataFrame] = {}  # 已读取的完整工作表数据
+        self._file_size_mb = None  # 加载时记录的文件大小（MB）
         
-    def load_file(self, file_path: str) -> bool:
+    def load_file(self, file_path: str, sheet_names: Optional[List[str]] = None) -> bool:
         """
         加载Excel文件
         
         Args:
             file_path: Excel文件路径
+            sheet_names: 只加载指定工作表的信息，为None时加载全部工作表
             
         Returns:
             bool: 加载是否成功
@@ -43,8 +80,20 @@ class ExcelReader:
                 return False
                 
             # 读取Excel文件
-            self.excel_file = pd.ExcelFile(file_path)
+            self._engine = self._select_engine(file_path)
+            excel_file = pd.ExcelFile(file_path, engine=self._engine)
+            self._sheet_names = list(excel_file.sheet_names)
+            if sheet_names is not None:
+                self._sheet_names = [name for name in self._sheet_names if name in sheet_names]
+            if self._engine == 'calamine':
+                # calamine按路径读取时只解析所需工作表，无需常驻工作簿句柄
+                excel_file.close()
+                self.excel_file = None
+            else:
+                self.excel_file = excel_file
             self.file_path = file_path
+            self._file_size_mb = round(os.stat(file_path).st_size / (1024 * 1024), 2)
+            self._sheet_cache = {}
             
             # 获取工作表信息
             self._load_worksheets_info()
@@ -56,6 +105,20 @@ class ExcelReader:
             logger.error(f"加载Excel文件失败: {e}")
             return False
     
+    def _select_engine(self, file_path: str) -> str:
+        """
+        根据文件格式选择读取引擎
+        
+        Args:
+            file_path: Excel文件路径
+            
+        Returns:
+            str: pandas读取引擎名称
+        """
+        if file_path.lower().endswith('.xls'):
+            return 'xlrd'
+        return 'calamine' if _HAS_CALAMINE else 'openpyxl'
+    
     def _load_worksheets_info(self):
         """
         加载工作表信息
@@ -63,19 +126,31 @@ class ExcelReader:
         try:
             self.worksheets_info = {}
             
-            for sheet_name in self.excel_file.sheet_names:
+            # 行数探测复用已打开的openpyxl只读工作簿，其他引擎直接读取整表
+            book = self.excel_file.book if self.excel_file is not None else None
+            
+            for sheet_name in self._sheet_names:
                 try:
-                    # 读取工作表基本信息
-                    df = pd.read_excel(self.excel_file, sheet_name=sheet_name, nrows=0)
+                    # 只读取表头获取列信息
+                    df = self._read_excel(sheet_name, nrows=0)
+                    columns = list(df.columns)
                     
-                    # 获取实际数据行数
-                    full_df = pd.read_excel(self.excel_file, sheet_name=sheet_name)
+                    if columns:
+                        # 优先从只读工作簿的维度信息获取行数，避免完整解析工作表
+                        row_count = self._count_data_rows(book, sheet_name)
+                        if row_count is None:
+                            row_count = len(self._read_sheet(sheet_name))
+                    else:
+                        # 首行为空时只读表头得不到列，读取整表（与完整读取的列名、行数一致）
+                        full_df = self._read_sheet(sheet_name)
+                        columns = list(full_df.columns)
+                        row_count = len(full_df)
                     
                     self.worksheets_info[sheet_name] = {
-                        'max_row': len(full_df),
-                        'max_column': len(full_df.columns),
-                        'columns': list(full_df.columns),
-                        'has_data': len(full_df) > 0
+                        'max_row': row_count,
+                        'max_column': len(columns),
+                        'columns': columns,
+                        'has_data': row_count > 0
                     }
                     
                 except Exception as e:
@@ -90,6 +165,40 @@ class ExcelReader:
         except Exception as e:
             logger.error(f"加载工作表信息失败: {e}")
     
+    def _count_data_rows(self, book: Any, sheet_name: str) -> Optional[int]:
+        """
+        使用openpyxl只读工作簿获取数据行数（不含表头）
+        
+        以维度信息中的最大行号为上限，维度会把设置过格式的空行也算在内，
+        因此只在末尾有限范围内向前查找最后一个非空行，与pandas读取时去掉末尾空行的结果一致
+        
+        Args:
+            book: 已打开的工作簿
+            sheet_name: 工作表名称
+            
+        Returns:
+            Optional[int]: 数据行数，非openpyxl工作簿或无法确定时返回None
+        """
+        if not isinstance(book, Workbook):
+            return None
+        
+        ws = book[sheet_name]
+        max_row = ws.max_row
+        if not max_row:
+            return None
+        
+        start_row = max(max_row - _TRAILING_SCAN_ROWS + 1, 1)
+        last_row = 0
+        for r_idx, row in enumerate(ws.iter_rows(min_row=start_row, max_row=max_row, values_only=True), start_row):
+            if any(value is not None for value in row):
+                last_row = r_idx
+        
+        # 末尾空行超出检查范围时无法确定，交由调用方完整读取
+        if last_row == 0 and start_row > 1:
+            return None
+        
+        return max(last_row - 1, 0)
+    
     def get_worksheets_list(self) -> List[Dict[str, Any]]:
         """
         获取工作表列表
@@ -116,31 +225,18 @@ class ExcelReader:
         Returns:
             Optional[str]: 目标工作表名称
         """
-        # 优先查找包含"发票基础信息"的工作表
-        for sheet_name in self.worksheets_info.keys():
-            if "发票基础信息" in sheet_name:
-                return sheet_name
-        
-        # 查找包含"发票信息"的工作表
-        for sheet_name in self.worksheets_info.keys():
-            if "发票信息" in sheet_name:
-                return sheet_name
-        
-        # 查找包含"基础信息"的工作表
-        for sheet_name in self.worksheets_info.keys():
-            if "基础信息" in sheet_name:
-                return sheet_name
-        
-        # 返回第一个有数据的工作表
+        # 单次遍历按关键词优先级打分，同分时优先选择有数据的工作表
+        best_score = -1
+        best_sheet = None
         for sheet_name, info in self.worksheets_info.items():
+            score = max((s for keyword, s in _TARGET_SHEET_PRIORITIES if keyword in sheet_name), default=0)
             if info['has_data']:
-                return sheet_name
-        
-        # 返回第一个工作表
-        if self.worksheets_info:
-            return list(self.worksheets_info.keys())[0]
+                score += 0.5
+            if score > best_score:
+                best_score = score
+                best_sheet = sheet_name
         
-        return None
+        return best_sheet
     
     def select_worksheet(self, worksheet_name: str) -> bool:
         """
@@ -180,8 +276,12 @@ class ExcelReader:
                 logger.error(f"工作表不存在: {worksheet_name}")
                 return None
                 
-            df = pd.read_excel(self.excel_file, sheet_name=worksheet_name, nrows=0)
-            headers = list(df.columns)
+            cached = self._sheet_cache.get(worksheet_name)
+            if cached is not None:
+                headers = list(cached.columns)
+            else:
+                df = self._read_excel(worksheet_name, nrows=0)
+                headers = list(df.columns)
             
             logger.info(f"读取表头成功，共 {len(headers)} 列")
             return headers
@@ -206,7 +306,11 @@ class ExcelReader:
                 logger.error(f"工作表不存在: {worksheet_name}")
                 return pd.DataFrame()
                 
-            df = pd.read_excel(self.excel_file, sheet_name=worksheet_name, nrows=preview_rows)
+            cached = self._sheet_cache.get(worksheet_name)
+            if cached is not None:
+                df = cached.head(preview_rows)
+            else:
+                df = self._read_excel(worksheet_name, nrows=preview_rows)
             logger.info(f"读取预览数据成功，{len(df)} 行 x {len(df.columns)} 列")
             return df
             
@@ -229,7 +333,7 @@ class ExcelReader:
                 logger.error(f"工作表不存在: {worksheet_name}")
                 return pd.DataFrame()
                 
-            df = pd.read_excel(self.excel_file, sheet_name=worksheet_name)
+            df = self._read_sheet(worksheet_name)
             logger.info(f"读取完整数据成功，{len(df)} 行 x {len(df.columns)} 列")
             return df
             
@@ -237,6 +341,129 @@ class ExcelReader:
             logger.error(f"读取完整数据失败: {e}")
             return pd.DataFrame()
     
+    def _read_excel(self, sheet_name: str, **kwargs) -> pd.DataFrame:
+        """
+        读取工作表（calamine引擎直接按路径读取，其他引擎复用已打开的ExcelFile）
+        
+        Args:
+            sheet_name: 工作表名称
+            **kwargs: 传递给pd.read_excel的其他参数
+            
+        Returns:
+            pd.DataFrame: 读取的数据
+        """
+        source = self.excel_file if self.excel_file is not None else self.file_path
+        return pd.read_excel(source, sheet_name=sheet_name, engine=self._engine, **kwargs)
+    
+    def _read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        """
+        读取完整工作表数据（带缓存）
+        
+        Args:
+            sheet_name: 工作表名称
+            
+        Returns:
+            pd.DataFrame: 工作表数据，调用方不应原地修改
+        """
+        df = self._sheet_cache.get(sheet_name)
+        if df is None:
+            df = self._read_excel(sheet_name)
+            self._sheet_cache[sheet_name] = df
+        return df
+    
+    def read_columns(self, worksheet_name: str, columns: List[str]) -> pd.DataFrame:
+        """
+        只读取工作表中的指定列
+        
+        Args:
+            worksheet_name: 工作表名称
+            columns: 需要读取的列名列表，不存在的列会被忽略
+            
+        Returns:
+            pd.DataFrame: 指定列的数据
+        """
+        try:
+            if worksheet_name not in self.worksheets_info:
+                logger.error(f"工作表不存在: {worksheet_name}")
+                return pd.DataFrame()
+            
+            wanted = set(columns)
+            cached = self._sheet_cache.get(worksheet_name)
+            if cached is not None:
+                df = cached.loc[:, [col for col in cached.columns if col in wanted]]
+            else:
+                df = self._read_excel(worksheet_name, usecols=lambda col: col in wanted)
+            logger.info(f"读取指定列成功，{len(df)} 行 x {len(df.columns)} 列")
+            return df
+            
+        except Exception as e:
+            logger.error(f"读取指定列失败: {e}")
+            return pd.DataFrame()
+    
+    def sum_column(self, worksheet_name: str, column_name: str) -> Optional[Dict[str, Any]]:
+        """
+        只读取单列并求和，不加载整张工作表
+        
+        openpyxl引擎下以只读模式逐行读取目标列；calamine/xlrd引擎或已缓存整表时
+        直接使用pandas读取该列。两种方式使用同一规则（_sum_numeric_values）：
+        所有非空值都能解析为数字（与pandas读取时的类型推断一致，含以文本存储的数字，
+        不含布尔值）时才视为数值列
+        
+        Args:
+            worksheet_name: 工作表名称
+            column_name: 列名
+            
+        Returns:
+            Optional[Dict[str, Any]]: 包含sum、formatted_sum、valid_count，
+                列不存在、不是数值列或没有数值时返回None
+        """
+        try:
+            if worksheet_name not in self.worksheets_info:
+                logger.error(f"工作表不存在: {worksheet_name}")
+                return None
+            
+            use_openpyxl = (
+                self._engine == 'openpyxl'
+                and worksheet_name not in self._sheet_cache
+                and self.file_path.lower().endswith('.xlsx')
+            )
+            if use_openpyxl:
+                book = load_workbook(self.file_path, read_only=True, data_only=True)
+                try:
+                    ws = book[worksheet_name]
+                    header_row = next(ws.iter_rows(max_row=1, values_only=True), ())
+                    headers = [str(value) if value is not None else None for value in header_row]
+                    if column_name not in headers:
+                        return None
+                    idx = headers.index(column_name) + 1
+                    values = [
+                        value for (value,) in ws.iter_rows(min_row=2, min_col=idx, max_col=idx, values_only=True)
+                        if value is not None
+                    ]
+                finally:
+                    book.close()
+            else:
+                df = self.read_columns(worksheet_name, [column_name])
+                if column_name not in df.columns:
+                    return None
+                values = df[column_name].dropna().tolist()
+            
+            result = _sum_numeric_values(values)
+            if result is None:
+                return None
+            total, valid_count = result
+            
+            logger.info(f"单列求和完成: {column_name} = {total:.2f}（{valid_count} 条）")
+            return {
+                'sum': total,
+                'formatted_sum': f"{total:.2f}",
+                'valid_count': valid_count
+            }
+            
+        except Exception as e:
+            logger.error(f"单列求和失败: {e}")
+            return None
+    
     def get_file_info(self) -> Optional[Dict[str, Any]]:
         """
         获取文件信息
@@ -248,13 +475,10 @@ class ExcelReader:
             if not self.file_path:
                 return None
                 
-            file_stat = os.stat(self.file_path)
-            file_size_mb = round(file_stat.st_size / (1024 * 1024), 2)
-            
             return {
                 'file_path': self.file_path,
                 'file_name': os.path.basename(self.file_path),
-                'file_size_mb': file_size_mb,
+                'file_size_mb': self._file_size_mb,
                 'worksheet_count': len(self.worksheets_info),
                 'worksheets': list(self.worksheets_info.keys())
             }
@@ -271,14 +495,14 @@ class ExcelReader:
             Optional[Dict[str, pd.DataFrame]]: 所有工作表数据的字典
         """
         try:
-            if not self.excel_file or not self.worksheets_info:
+            if not self.file_path or not self.worksheets_info:
                 logger.error("Excel文件未加载")
                 return None
                 
             all_sheets_data = {}
             for sheet_name in self.worksheets_info.keys():
                 try:
-                    df = pd.read_excel(self.excel_file, sheet_name=sheet_name)
+                    df = self._read_sheet(sheet_name)
                     all_sheets_data[sheet_name] = df
                     logger.debug(f"读取工作表 {sheet_name}: {len(df)} 行 x {len(df.columns)} 列")
                 except Exception as e:
@@ -304,6 +528,10 @@ class ExcelReader:
             self.excel_file = None
             self.worksheets_info = {}
             self.current_worksheet = None
+            self._sheet_names = []
+            self._engine = None
+            self._file_size_mb = None
+            self._sheet_cache = {}
             
             logger.info("Excel文件已关闭")
             
@@ -5,18 +5,77 @@
 """
 
 import pandas as pd
+import numpy as np
 import os
+import re
+import shutil
 import subprocess
 import platform
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Any
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Border, Side
+from functools import lru_cache
+from itertools import chain
+from io import BytesIO
+from openpyxl import LXML as _OPENPYXL_LXML, Workbook, load_workbook
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.worksheet.page import PageMargins, PrintOptions
 from src.utils.logger import get_logger
 
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
 logger = get_logger("FileHandler")
 
+# openpyxl检测到lxml时使用C扩展序列化XML，写入大文件时速度明显更快
+if not _OPENPYXL_LXML:
+    logger.warning("未检测到lxml，Excel文件写入将使用较慢的纯Python实现，建议安装: pip install lxml")
+
+# 文件名中不允许出现的字符
+_INVALID_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+@lru_cache(maxsize=4)
+def _read_template_bytes(path: str, mtime: float) -> bytes:
+    """
+    读取模板文件内容（按路径和修改时间缓存，文件变化后自动失效）
+    
+    Args:
+        path: 文件路径
+        mtime: 文件修改时间
+        
+    Returns:
+        bytes: 文件内容
+    """
+    with open(path, 'rb') as f:
+        return f.read()
+
+# 按操作系统确定打开文件和打开文件位置的方式（导入时确定一次）
+_SYSTEM = platform.system()
+if _SYSTEM == "Windows":
+    _OPEN_FILE = os.startfile
+    _REVEAL_FILE = lambda path: subprocess.run(["explorer", "/select,", path])
+elif _SYSTEM == "Darwin":  # macOS
+    _OPEN_FILE = lambda path: subprocess.run(["open", path])
+    _REVEAL_FILE = lambda path: subprocess.run(["open", "-R", path])
+else:  # Linux
+    _OPEN_FILE = lambda path: subprocess.run(["xdg-open", path])
+    _REVEAL_FILE = lambda path: subprocess.run(["xdg-open", os.path.dirname(path)])
+
+# 流式写入Excel时每次转换的行数
+_STREAM_CHUNK_ROWS = 10000
+
+# CSV分块写入的行数和文件缓冲区大小
+_CSV_CHUNK_SIZE = 50000
+_CSV_BUFFER_SIZE = 1 << 20
+
+# 细边框样式
+_THIN_SIDE = Side(style='thin')
+_THIN_BORDER = Border(left=_THIN_SIDE, right=_THIN_SIDE, top=_THIN_SIDE, bottom=_THIN_SIDE)
+
 class FileHandler:
     """
     文件处理器类
@@ -26,7 +85,26 @@ class FileHandler:
     def __init__(self):
         self.original_file_path = None
         self.output_directory = None
+        # 已确认存在的输出目录
+        self._known_dirs = set()
+        # 模板无格式判断结果：(路径, 修改时间) -> 无格式时为工作表名，否则为None
+        self._trivial_templates = {}
         
+    def _ensure_dir(self, file_path: str):
+        """
+        确保文件所在目录存在（已确认过的目录不再重复检查）
+        
+        Args:
+            file_path: 文件路径
+        """
+        output_dir = os.path.dirname(file_path)
+        if not output_dir or output_dir in self._known_dirs:
+            return
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+            logger.info(f"创建输出目录: {output_dir}")
+        self._known_dirs.add(output_dir)
+    
     def set_original_file(self, file_path: str):
         """
         设置原始文件路径
@@ -102,14 +180,12 @@ class FileHandler:
                 return False
             
             # 确保输出目录存在
-            output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-                logger.info(f"创建输出目录: {output_dir}")
+            self._ensure_dir(output_path)
             
-            # 保存到Excel文件
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                data.to_excel(writer, sheet_name=sheet_name, index=False)
+            # 以只写模式流式保存到Excel文件
+            wb = Workbook(write_only=True)
+            self._write_sheet_streaming(wb, sheet_name, data)
+            wb.save(output_path)
             
             logger.info(f"数据保存成功: {output_path}")
             logger.info(f"保存数据: {len(data)} 行 x {len(data.columns)} 列")
@@ -137,13 +213,11 @@ class FileHandler:
                 return False
             
             # 确保输出目录存在
-            output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-                logger.info(f"创建输出目录: {output_dir}")
+            self._ensure_dir(output_path)
             
-            # 保存到CSV文件
-            data.to_csv(output_path, index=False, encoding=encoding)
+            # 分块写入CSV文件（大缓冲区），避免一次性格式化全部数据
+            with open(output_path, 'w', encoding=encoding, newline='', buffering=_CSV_BUFFER_SIZE) as f:
+                data.to_csv(f, index=False, chunksize=_CSV_CHUNK_SIZE)
             
             logger.info(f"CSV文件保存成功: {output_path}")
             return True
@@ -167,43 +241,26 @@ class FileHandler:
             bool: 操作是否成功
         """
         try:
+            # 确保输出目录存在
+            self._ensure_dir(target_path)
+            
+            # 已确认模板没有任何格式时，直接流式写入，跳过加载和改写模板
+            template_key = (os.path.abspath(source_path), os.path.getmtime(source_path))
+            if self._save_with_trivial_template(template_key, target_path, data, sheet_name):
+                return True
+            
             # 加载原始工作簿
-            source_wb = load_workbook(source_path)
+            source_wb = self._load_template(source_path)
             
             # 检查目标工作表是否存在
             if sheet_name in source_wb.sheetnames:
                 target_ws = source_wb[sheet_name]
                 
-                # 保存原始的列宽和行高信息
-                original_column_widths = {}
-                original_row_heights = {}
-                
-                # 获取原始列宽
-                for col_letter, col_dimension in target_ws.column_dimensions.items():
-                    if col_dimension.width:
-                        original_column_widths[col_letter] = col_dimension.width
-                
-                # 获取原始行高
-                for row_num, row_dimension in target_ws.row_dimensions.items():
-                    if row_dimension.height:
-                        original_row_heights[row_num] = row_dimension.height
-                
-                # 清除工作表内容但保留格式
-                target_ws.delete_rows(1, target_ws.max_row)
+                # 记录模板是否无格式，供后续保存走快速路径
+                self._remember_trivial_template(template_key, source_wb, target_ws, sheet_name)
                 
                 # 写入新数据
-                for r_idx, row in enumerate(dataframe_to_rows(data, index=False, header=True), 1):
-                    for c_idx, value in enumerate(row, 1):
-                        target_ws.cell(row=r_idx, column=c_idx, value=value)
-                
-                # 恢复列宽
-                for col_letter, width in original_column_widths.items():
-                    target_ws.column_dimensions[col_letter].width = width
-                
-                # 恢复行高
-                for row_num, height in original_row_heights.items():
-                    if row_num <= target_ws.max_row:
-                        target_ws.row_dimensions[row_num].height = height
+                self._write_dataframe_cells(target_ws, data)
                 
                 # 保存工作簿
                 source_wb.save(target_path)
@@ -236,53 +293,27 @@ class FileHandler:
             bool: 操作是否成功
         """
         try:
+            # 确保输出目录存在
+            self._ensure_dir(target_path)
+            border = _THIN_BORDER if add_border else None
+            
+            # 已确认模板没有任何格式时，直接流式写入，跳过加载和改写模板
+            template_key = (os.path.abspath(source_path), os.path.getmtime(source_path))
+            if self._save_with_trivial_template(template_key, target_path, data, sheet_name, border):
+                return True
+            
             # 加载原始工作簿
-            source_wb = load_workbook(source_path)
+            source_wb = self._load_template(source_path)
             
             # 检查目标工作表是否存在
             if sheet_name in source_wb.sheetnames:
                 target_ws = source_wb[sheet_name]
                 
-                # 保存原始的列宽和行高信息
-                original_column_widths = {}
-                original_row_heights = {}
-                
-                # 获取原始列宽
-                for col_letter, col_dimension in target_ws.column_dimensions.items():
-                    if col_dimension.width:
-                        original_column_widths[col_letter] = col_dimension.width
-                
-                # 获取原始行高
-                for row_num, row_dimension in target_ws.row_dimensions.items():
-                    if row_dimension.height:
-                        original_row_heights[row_num] = row_dimension.height
-                
-                # 清除工作表内容但保留格式
-                target_ws.delete_rows(1, target_ws.max_row)
-                
-                # 写入新数据
-                for r_idx, row in enumerate(dataframe_to_rows(data, index=False, header=True), 1):
-                    for c_idx, value in enumerate(row, 1):
-                        cell = target_ws.cell(row=r_idx, column=c_idx, value=value)
-                        
-                        # 添加边框
-                        if add_border:
-                            thin_border = Border(
-                                left=Side(style='thin'),
-                                right=Side(style='thin'),
-                                top=Side(style='thin'),
-                                bottom=Side(style='thin')
-                            )
-                            cell.border = thin_border
-                
-                # 恢复列宽
-                for col_letter, width in original_column_widths.items():
-                    target_ws.column_dimensions[col_letter].width = width
+                # 记录模板是否无格式，供后续保存走快速路径
+                self._remember_trivial_template(template_key, source_wb, target_ws, sheet_name)
                 
-                # 恢复行高
-                for row_num, height in original_row_heights.items():
-                    if row_num <= target_ws.max_row:
-                        target_ws.row_dimensions[row_num].height = height
+                # 写入新数据（可选添加边框）
+                self._write_dataframe_cells(target_ws, data, border)
                 
                 # 保存工作簿
                 source_wb.save(target_path)
@@ -336,14 +367,7 @@ class FileHandler:
                 logger.error(f"文件不存在: {file_path}")
                 return False
             
-            system = platform.system()
-            
-            if system == "Windows":
-                os.startfile(file_path)
-            elif system == "Darwin":  # macOS
-                subprocess.run(["open", file_path])
-            else:  # Linux
-                subprocess.run(["xdg-open", file_path])
+            _OPEN_FILE(file_path)
             
             logger.info(f"打开文件: {file_path}")
             return True
@@ -368,14 +392,7 @@ class FileHandler:
                 return False
             
             directory = os.path.dirname(file_path)
-            system = platform.system()
-            
-            if system == "Windows":
-                subprocess.run(["explorer", "/select,", file_path])
-            elif system == "Darwin":  # macOS
-                subprocess.run(["open", "-R", file_path])
-            else:  # Linux
-                subprocess.run(["xdg-open", directory])
+            _REVEAL_FILE(file_path)
             
             logger.info(f"打开文件位置: {directory}")
             return True
@@ -395,11 +412,14 @@ class FileHandler:
             Optional[float]: 文件大小（MB）
         """
         try:
-            if not os.path.exists(file_path):
+            # 一次stat同时完成存在性检查和大小获取
+            try:
+                size_bytes = os.stat(file_path).st_size
+            except FileNotFoundError:
                 return None
-                
-            size_bytes = os.path.getsize(file_path)
-            size_mb = round(size_bytes / (1024 * 1024), 2)
+            
+            # 整数运算保留两位小数（四舍五入）
+            size_mb = (size_bytes * 100 + (1 << 19)) // (1 << 20) / 100
             return size_mb
             
         except Exception as e:
@@ -421,12 +441,8 @@ class FileHandler:
             if not file_path or not isinstance(file_path, str):
                 return False
             
-            # 检查目录是否存在
+            # 检查目录是否存在且有写入权限（目录不存在时access同样返回False）
             directory = os.path.dirname(file_path)
-            if not os.path.exists(directory):
-                return False
-            
-            # 检查是否有写入权限
             if not os.access(directory, os.W_OK):
                 return False
             
@@ -436,12 +452,13 @@ class FileHandler:
             logger.error(f"验证文件路径失败: {e}")
             return False
     
-    def create_backup(self, file_path: str) -> Optional[str]:
+    def create_backup(self, file_path: str, preserve_metadata: bool = False) -> Optional[str]:
         """
         创建文件备份
         
         Args:
             file_path: 原文件路径
+            preserve_metadata: 是否同时复制修改时间、权限等元数据（默认只复制内容，速度更快）
             
         Returns:
             Optional[str]: 备份文件路径
@@ -460,8 +477,10 @@ class FileHandler:
             backup_path = os.path.join(directory, backup_filename)
             
             # 复制文件
-            import shutil
-            shutil.copy2(file_path, backup_path)
+            if preserve_metadata:
+                shutil.copy2(file_path, backup_path)
+            else:
+                shutil.copyfile(file_path, backup_path)
             
             logger.info(f"创建备份文件: {backup_path}")
             return backup_path
@@ -472,7 +491,9 @@ class FileHandler:
     
     def save_multiple_sheets_to_excel(self, sheet_data: Dict[str, pd.DataFrame], 
                                     output_path: str, preserve_format: bool = True,
-                                    source_path: Optional[str] = None) -> bool:
+                                    source_path: Optional[str] = None,
+                                    allow_csv_fallback: bool = False,
+                                    fallback_format: str = 'csv') -> bool:
         """
         保存多个工作表到Excel文件
         
@@ -481,6 +502,8 @@ class FileHandler:
             output_path: 输出文件路径
             preserve_format: 是否保留原始格式
             source_path: 源文件路径（用于保留格式）
+            allow_csv_fallback: 不保留格式时，是否改为每个工作表单独输出为数据文件（速度远快于xlsx）
+            fallback_format: 数据文件格式，'csv' 或 'parquet'（需要pyarrow）
             
         Returns:
             bool: 保存是否成功
@@ -491,14 +514,14 @@ class FileHandler:
                 return False
             
             # 确保输出目录存在
-            output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-                logger.info(f"创建输出目录: {output_dir}")
+            self._ensure_dir(output_path)
             
             if preserve_format and source_path and os.path.exists(source_path):
                 # 保留原始格式的保存方式
                 return self._save_with_format_preservation(sheet_data, output_path, source_path)
+            elif allow_csv_fallback:
+                # 输出为数据文件的快速保存方式
+                return self._save_as_data_files(sheet_data, output_path, fallback_format)
             else:
                 # 普通保存方式
                 return self._save_without_format_preservation(sheet_data, output_path)
@@ -522,49 +545,20 @@ class FileHandler:
         """
         try:
             # 加载原始工作簿
-            source_wb = load_workbook(source_path)
+            source_wb = self._load_template(source_path)
             
             # 更新每个工作表的数据
             for sheet_name, data in sheet_data.items():
                 if sheet_name in source_wb.sheetnames:
                     target_ws = source_wb[sheet_name]
                     
-                    # 保存原始的列宽和行高信息
-                    original_column_widths = {}
-                    original_row_heights = {}
-                    
-                    # 获取原始列宽
-                    for col_letter, col_dimension in target_ws.column_dimensions.items():
-                        if col_dimension.width:
-                            original_column_widths[col_letter] = col_dimension.width
-                    
-                    # 获取原始行高
-                    for row_num, row_dimension in target_ws.row_dimensions.items():
-                        if row_dimension.height:
-                            original_row_heights[row_num] = row_dimension.height
-                    
-                    # 清除工作表内容但保留格式
-                    target_ws.delete_rows(1, target_ws.max_row)
-                    
                     # 写入新数据
-                    for r_idx, row in enumerate(dataframe_to_rows(data, index=False, header=True), 1):
-                        for c_idx, value in enumerate(row, 1):
-                            target_ws.cell(row=r_idx, column=c_idx, value=value)
+                    self._write_dataframe_cells(target_ws, data)
                     
-                    # 恢复列宽
-                    for col_letter, width in original_column_widths.items():
-                        target_ws.column_dimensions[col_letter].width = width
-                    
-                    # 恢复行高
-                    for row_num, height in original_row_heights.items():
-                        if row_num <= target_ws.max_row:
-                            target_ws.row_dimensions[row_num].height = height
                 else:
                     # 如果工作表不存在，创建新的工作表
                     new_ws = source_wb.create_sheet(sheet_name)
-                    for r_idx, row in enumerate(dataframe_to_rows(data, index=False, header=True), 1):
-                        for c_idx, value in enumerate(row, 1):
-                            new_ws.cell(row=r_idx, column=c_idx, value=value)
+                    self._write_dataframe_cells(new_ws, data)
             
             # 保存工作簿
             source_wb.save(output_path)
@@ -578,6 +572,50 @@ class FileHandler:
             logger.error(f"保存Excel文件（保留格式）失败: {e}")
             return False
     
+    def _save_as_data_files(self, sheet_data: Dict[str, pd.DataFrame],
+                            output_path: str, file_format: str = 'csv') -> bool:
+        """
+        将每个工作表分别保存为数据文件（<输出文件名>_<工作表名>.csv/.parquet）
+        
+        Args:
+            sheet_data: 工作表数据字典
+            output_path: 输出文件路径（用于确定目录和文件名前缀）
+            file_format: 文件格式，'csv' 或 'parquet'
+            
+        Returns:
+            bool: 保存是否成功
+        """
+        try:
+            if file_format not in ('csv', 'parquet'):
+                logger.error(f"不支持的输出格式: {file_format}")
+                return False
+            if file_format == 'parquet' and not _HAS_PYARROW:
+                logger.error("保存Parquet文件需要安装pyarrow")
+                return False
+            
+            stem = os.path.splitext(output_path)[0]
+            saved_count = 0
+            for sheet_name, data in sheet_data.items():
+                if data is None or data.empty:
+                    continue
+                
+                safe_name = _INVALID_FILENAME_CHARS.sub('_', str(sheet_name))
+                file_path = f"{stem}_{safe_name}.{file_format}"
+                if file_format == 'csv':
+                    if not self.save_to_csv(data, file_path):
+                        return False
+                else:
+                    data.to_parquet(file_path, engine='pyarrow', compression='zstd', index=False)
+                    logger.info(f"Parquet文件保存成功: {file_path}")
+                saved_count += 1
+            
+            logger.info(f"保存数据文件数量: {saved_count}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"保存数据文件失败: {e}")
+            return False
+    
     def _save_without_format_preservation(self, sheet_data: Dict[str, pd.DataFrame], 
                                         output_path: str) -> bool:
         """
@@ -591,10 +629,12 @@ class FileHandler:
             bool: 保存是否成功
         """
         try:
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                for sheet_name, data in sheet_data.items():
-                    if data is not None and not data.empty:
-                        data.to_excel(writer, sheet_name=sheet_name, index=False)
+            # 以只写模式流式保存到Excel文件
+            wb = Workbook(write_only=True)
+            for sheet_name, data in sheet_data.items():
+                if data is not None and not data.empty:
+                    self._write_sheet_streaming(wb, sheet_name, data)
+            wb.save(output_path)
             
             logger.info(f"Excel文件保存成功: {output_path}")
             logger.info(f"保存工作表数量: {len(sheet_data)}")
@@ -602,4 +642,195 @@ class FileHandler:
             
         except Exception as e:
             logger.error(f"保存Excel文件失败: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def _load_template(self, source_path: str):
+        """
+        加载格式模板工作簿（重复使用同一源文件时从内存缓存加载，不再读盘）
+        
+        每次都返回新的工作簿对象，调用方可以放心修改
+        
+        Args:
+            source_path: 源文件路径
+            
+        Returns:
+            Workbook: 工作簿对象
+        """
+        content = _read_template_bytes(os.path.abspath(source_path), os.path.getmtime(source_path))
+        return load_workbook(BytesIO(content))
+    
+    def _save_with_trivial_template(self, template_key: tuple, target_path: str, data: pd.DataFrame,
+                                    sheet_name: str, border: Optional[Border] = None) -> bool:
+        """
+        模板已确认无格式时直接流式写入数据，跳过加载和改写模板
+        
+        Args:
+            template_key: 模板缓存键（绝对路径, 修改时间）
+            target_path: 目标文件路径
+            data: 要写入的数据
+            sheet_name: 工作表名称
+            border: 单元格边框，为None时不设置
+            
+        Returns:
+            bool: 是否已通过快速路径保存
+        """
+        if self._trivial_templates.get(template_key) != sheet_name:
+            return False
+        
+        wb = Workbook(write_only=True)
+        self._write_sheet_streaming(wb, sheet_name, data, styled_header=False, border=border)
+        wb.save(target_path)
+        logger.info(f"Excel文件保存成功（模板无格式，直接写入）: {target_path}")
+        return True
+    
+    def _remember_trivial_template(self, template_key: tuple, wb: Workbook, ws, sheet_name: str):
+        """
+        记录模板是否无格式，供后续保存走快速路径
+        
+        Args:
+            template_key: 模板缓存键（绝对路径, 修改时间）
+            wb: 模板工作簿
+            ws: 目标工作表
+            sheet_name: 工作表名称
+        """
+        self._trivial_templates[template_key] = (
+            sheet_name if self._is_trivial_template(wb, ws) else None
+        )
+    
+    @staticmethod
+    def _is_trivial_template(wb: Workbook, ws) -> bool:
+        """
+        判断模板是否没有任何需要保留的格式（只有一个工作表，且无列宽行高、合并单元格、条件格式、数据验证、
+        单元格样式、图片图表、打印设置、工作表保护、定义名称等）
+        
+        Args:
+            wb: 模板工作簿
+            ws: 目标工作表
+            
+        Returns:
+            bool: 模板是否无格式
+        """
+        if len(wb.sheetnames) != 1:
+            return False
+        if ws.column_dimensions or ws.row_dimensions or ws.merged_cells.ranges:
+            return False
+        if len(ws.conditional_formatting) or ws.data_validations.dataValidation:
+            return False
+        if ws.freeze_panes or ws.auto_filter.ref:
+            return False
+        if ws._images or ws._charts:
+            return False
+        # 打印标题、打印区域、页面设置、页边距、页眉页脚均为默认值
+        if ws.print_title_rows or ws.print_title_cols or ws.print_area:
+            return False
+        if dict(ws.page_setup) or ws.page_margins != PageMargins() or ws.print_options != PrintOptions():
+            return False
+        if ws.HeaderFooter:
+            return False
+        if ws.protection.sheet or wb.defined_names or ws.defined_names:
+            return False
+        return not any(cell.has_style for cell in ws._cells.values())
+    
+    def _write_sheet_streaming(self, wb: Workbook, sheet_name: str, data: pd.DataFrame,
+                               styled_header: bool = True, border: Optional[Border] = None):
+        """
+        以只写模式向工作簿追加工作表并逐行写入数据
+        
+        Args:
+            wb: 只写模式的工作簿
+            sheet_name: 工作表名称
+            data: 要写入的数据
+            styled_header: 表头是否使用加粗、边框、居中样式
+            border: 非样式表头及数据单元格的边框，为None时不设置
+        """
+        ws = wb.create_sheet(sheet_name)
+        
+        if styled_header:
+            # 表头样式与pandas.to_excel保持一致（加粗、细边框、居中）
+            header_font = Font(bold=True)
+            header_alignment = Alignment(horizontal='center', vertical='top')
+            header_row = []
+            for name in data.columns:
+                cell = WriteOnlyCell(ws, value=name)
+                cell.font = header_font
+                cell.border = _THIN_BORDER
+                cell.alignment = header_alignment
+                header_row.append(cell)
+            ws.append(header_row)
+        else:
+            ws.append(self._bordered_row(ws, data.columns, border))
+        
+        # 按列预先转换为Python原生类型，逐行写入；分块转换，限制同时存在的Python对象数量
+        for start in range(0, len(data), _STREAM_CHUNK_ROWS):
+            chunk = data.iloc[start:start + _STREAM_CHUNK_ROWS]
+            columns = [self._column_to_pylist(chunk.iloc[:, i]) for i in range(chunk.shape[1])]
+            for row in zip(*columns):
+                ws.append(self._bordered_row(ws, row, border))
+    
+    @staticmethod
+    def _bordered_row(ws, values, border: Optional[Border]) -> list:
+        """
+        为只写工作表的一行值加上边框
+        
+        Args:
+            ws: 只写工作表
+            values: 一行的值
+            border: 单元格边框，为None时原样返回值
+            
+        Returns:
+            list: 可直接追加到工作表的一行
+        """
+        if border is None:
+            return list(values)
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.border = border
+            cells.append(cell)
+        return cells
+    
+    @staticmethod
+    def _column_to_pylist(column: pd.Series) -> list:
+        """
+        将一列数据按列类型一次性转换为Python原生值列表（空值转换为None）
+        
+        Args:
+            column: 列数据
+            
+        Returns:
+            list: 值列表
+        """
+        # 可空扩展类型（如Int64）含pd.NA，统一走通用分支
+        kind = column.dtype.kind if isinstance(column.dtype, np.dtype) else 'O'
+        if kind in 'iub':
+            return column.tolist()
+        if kind == 'f':
+            return [None if v != v else v for v in column.tolist()]
+        if kind == 'M' and column.dt.tz is None:
+            return [None if v is pd.NaT else v for v in column.dt.to_pydatetime().tolist()]
+        return column.astype(object).where(column.notna(), None).tolist()
+    
+    def _write_dataframe_cells(self, ws, data: pd.DataFrame, border: Optional[Border] = None):
+        """
+        将数据（含表头）写入普通工作表
+        
+        先清空原有单元格（与删除全部行的效果相同，列宽、行高等工作表格式保留），
+        再直接操作工作表的单元格字典写入新单元格，避免逐个调用ws.cell()的查找开销。
+        不复用旧单元格：删除列后数据会左移，旧单元格的数字格式、填充等样式属于其他列
+        
+        Args:
+            ws: 目标工作表
+            data: 要写入的数据
+            border: 单元格边框，为None时不设置
+        """
+        cells = ws._cells
+        cells.clear()
+        
+        # 写入表头与数据行
+        rows = data.itertuples(index=False, name=None)
+        for r_idx, row in enumerate(chain((tuple(data.columns),), rows), 1):
+            for c_idx, value in enumerate(row, 1):
+                cell = Cell(ws, row=r_idx, column=c_idx, value=value)
+                if border is not None:
+                    cell.border = border
+                cells[(r_idx, c_idx)] = cell
\ No newline at end of file
@@ -7,12 +7,53 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from typing import List, Dict, Any, Callable, Optional
+from bisect import bisect_right
+from collections import defaultdict
+from functools import lru_cache
 import re
+import numpy as np
 
 from src.utils.logger import get_logger
 
 logger = get_logger("ColumnSelector")
 
+# 选择器窗口尺寸（像素）
+_WINDOW_WIDTH = 900
+_WINDOW_HEIGHT = 750
+
+# 列选择区域每行显示的复选框数量和行高（像素）
+_ITEMS_PER_ROW = 4
+_ROW_HEIGHT = 26
+
+# 搜索输入停顿多久（毫秒）后执行筛选
+_SEARCH_DELAY_MS = 120
+
+# 选中列预览的刷新间隔（毫秒）和最多显示的列数
+_PREVIEW_DELAY_MS = 100
+_PREVIEW_MAX_COLUMNS = 200
+
+# 列数达到该值时构建三字符倒排索引加速搜索
+_TRIGRAM_MIN_HEADERS = 500
+
+
+@lru_cache(maxsize=4096)
+def _get_excel_column_name(index: int) -> str:
+    """
+    将列索引转换为Excel列名（A, B, C, ...）
+    
+    Args:
+        index: 列索引（从0开始）
+    
+    Returns:
+        str: Excel列名
+    """
+    result = ""
+    while index >= 0:
+        result = chr(65 + (index % 26)) + result
+        index = index // 26 - 1
+    return result
+
+
 class ColumnSelector:
     """
     列选择器
@@ -39,7 +80,28 @@ class ColumnSelector:
         self.callback = callback
         
         self.window = None
-        self.column_vars = {}  # 列复选框变量
+        selected_set = set(self.selected_columns)
+        self._selected_mask = np.fromiter(
+            (header in selected_set for header in self.headers), dtype=np.uint8, count=len(self.headers)
+        )  # 每列的选中状态（每列一个字节）
+        self._selected_count = int(self._selected_mask.sum())  # 已选中的列数（随点击增量更新）
+        self._visible_indices = list(range(len(self.headers)))  # 筛选后显示的列索引
+        self._headers_cf = [str(header).casefold() for header in self.headers]  # 预先做大小写折叠的列标题，用于搜索和模板匹配
+        self._trigram_index = self._build_trigram_index()  # 列数很多时用于加速搜索
+        self._template_match_cache = {}  # 模板列 -> 匹配到的列索引
+        self._headers_joined = None  # 模板匹配用的查找结构，首次应用模板时构建
+        self._header_starts = []
+        self._header_first_index = {}
+        self._header_lengths = []
+        self._excel_names = [_get_excel_column_name(i) for i in range(len(self.headers))]  # 各列的Excel列名
+        self._filter_after_id = None  # 待执行的筛选任务
+        self._preview_after_id = None  # 待执行的选中列预览刷新任务
+        self._wheel_delta = 0  # 尚未执行的滚轮滚动量
+        self._wheel_after_id = None  # 待执行的滚轮滚动任务
+        self._scrollregion_after_id = None  # 待执行的滚动区域更新任务
+        self._templates_cache = None  # 已加载的模板，保存/删除模板后失效
+        self._template_names = None  # 下拉框当前显示的模板名称
+        self._pool = []  # 复用的复选框：[复选框, 变量, 复选框窗口ID, 当前对应的列索引]
         self.search_var = tk.StringVar()
         self.template_var = tk.StringVar()
         
@@ -58,23 +120,25 @@ class ColumnSelector:
         """
         self.window = tk.Toplevel(self.parent)
         self.window.title("选择要删除的列")
-        self.window.geometry("900x750")
+        self.window.geometry(f"{_WINDOW_WIDTH}x{_WINDOW_HEIGHT}")
         self.window.resizable(True, True)
         
         # 设置为模态窗口
         self.window.transient(self.parent)
         self.window.grab_set()
         
+        # 关闭窗口时同样释放事件绑定和待执行任务
+        self.window.protocol("WM_DELETE_WINDOW", self._cancel_selection)
+        
         # 居中显示
         self._center_window()
     
     def _center_window(self):
         """
-        将窗口居中显示
+        将窗口居中显示（窗口尺寸固定，无需等待布局完成再读取）
         """
-        self.window.update_idletasks()
-        width = self.window.winfo_width()
-        height = self.window.winfo_height()
+        width = _WINDOW_WIDTH
+        height = _WINDOW_HEIGHT
         x = (self.window.winfo_screenwidth() // 2) - (width // 2)
         y = (self.window.winfo_screenheight() // 2) - (height // 2)
         self.window.geometry(f"{width}x{height}+{x}+{y}")
@@ -164,7 +228,7 @@ class ColumnSelector:
             textvariable=self.search_var,
             width=30
         )
-        self.search_var.trace("w", self._on_search_changed)
+        self._search_trace_id = self.search_var.trace("w", self._on_search_changed)
         
         # 搜索按钮
         self.search_btn = ttk.Button(
@@ -215,18 +279,18 @@ class ColumnSelector:
         # 列列表框架
         self.columns_list_frame = ttk.Frame(self.selection_frame)
         
-        # 创建滚动的列选择区域
-        self.columns_canvas = tk.Canvas(self.columns_list_frame, height=180)
+        # 创建滚动的列选择区域（只渲染可视区域内的行）
+        self.columns_canvas = tk.Canvas(
+            self.columns_list_frame,
+            height=180,
+            yscrollincrement=_ROW_HEIGHT
+        )
         self.columns_scrollbar = ttk.Scrollbar(
             self.columns_list_frame, 
             orient="vertical", 
-            command=self.columns_canvas.yview
+            command=self._on_scrollbar
         )
         self.columns_canvas.configure(yscrollcommand=self.columns_scrollbar.set)
-        
-        # 创建内部框架
-        self.columns_inner_frame = ttk.Frame(self.columns_canvas)
-        self.columns_canvas.create_window((0, 0), window=self.columns_inner_frame, anchor="nw")
     
     def _create_selection_stats_area(self):
         """
@@ -359,14 +423,18 @@ class ColumnSelector:
         加载模板列表
         """
         try:
-            templates = self.config_manager.load_templates()
-            template_names = list(templates.keys())
+            if self._templates_cache is None:
+                self._templates_cache = self.config_manager.load_templates()
+            template_names = tuple(self._templates_cache.keys())
             
-            self.template_combo['values'] = template_names
+            # 模板列表未变化时不重新设置下拉框
+            if template_names != self._template_names:
+                self.template_combo.configure(values=template_names)
+                self._template_names = template_names
             
             # 设置默认模板
             default_template = self.config_manager.get_setting("default_template", "")
-            if default_template in template_names:
+            if default_template in template_names and self.template_var.get() != default_template:
                 self.template_var.set(default_template)
             
         except Exception as e:
@@ -374,66 +442,16 @@ class ColumnSelector:
     
     def _populate_columns(self):
         """
-        填充列选择列表 - 多列布局，每列5个复选框
+        填充列选择列表 - 虚拟化渲染，每行4个复选框，只为可视区域创建复选框并循环复用
         """
         try:
-            # 清除现有组件
-            for widget in self.columns_inner_frame.winfo_children():
-                widget.destroy()
-            
-            self.column_vars = {}
-            
-            # 计算需要的列数（每列5个复选框）
-            items_per_column = 5
-            total_items = len(self.headers)
-            num_columns = (total_items + items_per_column - 1) // items_per_column  # 向上取整
-            
-            # 创建列框架列表
-            column_frames = []
-            for col_idx in range(num_columns):
-                col_frame = ttk.Frame(self.columns_inner_frame)
-                col_frame.pack(side="left", fill="y", padx=10, pady=5)
-                column_frames.append(col_frame)
-            
-            # 创建列复选框
-            for i, header in enumerate(self.headers):
-                # 计算当前复选框应该放在哪一列
-                col_idx = i // items_per_column
-                
-                # 创建复选框变量
-                var = tk.BooleanVar()
-                var.set(header in self.selected_columns)
-                self.column_vars[header] = var
-                
-                # 创建复选框框架
-                checkbox_frame = ttk.Frame(column_frames[col_idx])
-                checkbox_frame.pack(fill="x", padx=2, pady=2)
-                
-                # Excel列标识
-                excel_col = self._get_excel_column_name(i)
-                col_label = ttk.Label(
-                    checkbox_frame,
-                    text=f"{excel_col}:",
-                    width=4,
-                    font=("Arial", 9, "bold")
-                )
-                col_label.pack(side="left")
-                
-                # 复选框
-                checkbox = ttk.Checkbutton(
-                    checkbox_frame,
-                    text=header,
-                    variable=var,
-                    command=self._on_selection_changed
-                )
-                checkbox.pack(side="left", fill="x", expand=True, padx=(5, 0))
-                
-                # 绑定变量变化事件
-                var.trace("w", self._on_selection_changed)
+            self._visible_indices = list(range(len(self.headers)))
+            
+            # 画布尺寸变化时重新计算滚动区域并重绘
+            self.columns_canvas.bind("<Configure>", self._on_canvas_configure)
             
-            # 更新滚动区域
-            self.columns_inner_frame.update_idletasks()
-            self.columns_canvas.configure(scrollregion=self.columns_canvas.bbox("all"))
+            self._update_scrollregion()
+            self._render_viewport()
             
             # 绑定鼠标滚轮事件
             self._bind_mousewheel()
@@ -441,44 +459,159 @@ class ColumnSelector:
         except Exception as e:
             logger.error(f"填充列选择列表失败: {e}")
     
-    def _get_excel_column_name(self, index: int) -> str:
+    def _update_scrollregion(self):
+        """
+        根据筛选后的列数计算滚动区域
+        """
+        total_rows = (len(self._visible_indices) + _ITEMS_PER_ROW - 1) // _ITEMS_PER_ROW
+        width = self.columns_canvas.winfo_width()
+        self.columns_canvas.configure(scrollregion=(0, 0, width, total_rows * _ROW_HEIGHT))
+    
+    def _render_viewport(self):
+        """
+        将复选框池分配给可视区域内的列
         """
-        将列索引转换为Excel列名（A, B, C, ...）
+        try:
+            canvas = self.columns_canvas
+            width = max(canvas.winfo_width(), _ITEMS_PER_ROW)
+            height = max(canvas.winfo_height(), int(canvas.cget("height")))
+            top = int(canvas.canvasy(0))
+            
+            # 可视区域覆盖的行范围
+            first_row = top // _ROW_HEIGHT
+            last_row = (top + height) // _ROW_HEIGHT + 1
+            start = first_row * _ITEMS_PER_ROW
+            indices = self._visible_indices[start:last_row * _ITEMS_PER_ROW]
+            cell_width = width // _ITEMS_PER_ROW
+            
+            # 复选框池不足时补充
+            while len(self._pool) < len(indices):
+                self._pool.append(self._create_pool_item(len(self._pool)))
+            
+            for slot, item in enumerate(self._pool):
+                checkbox, var, window_id = item[:3]
+                if slot < len(indices):
+                    index = indices[slot]
+                    position = start + slot
+                    x = (position % _ITEMS_PER_ROW) * cell_width + 5
+                    y = (position // _ITEMS_PER_ROW) * _ROW_HEIGHT + _ROW_HEIGHT // 2
+                    
+                    item[3] = index
+                    checkbox.configure(text=f"{self._excel_names[index]}: {self.headers[index]}")
+                    var.set(bool(self._selected_mask[index]))
+                    canvas.itemconfigure(window_id, state="normal", width=max(cell_width - 10, 1))
+                    canvas.coords(window_id, x, y)
+                else:
+                    item[3] = -1
+                    canvas.itemconfigure(window_id, state="hidden")
+            
+        except Exception as e:
+            logger.error(f"渲染列选择列表失败: {e}")
+    
+    def _create_pool_item(self, slot: int) -> list:
+        """
+        创建一个可复用的复选框
         
         Args:
-            index: 列索引（从0开始）
+            slot: 在复选框池中的位置
         
         Returns:
-            str: Excel列名
+            list: [复选框, 变量, 复选框窗口ID, 当前对应的列索引]
+        """
+        var = tk.BooleanVar()
+        checkbox = ttk.Checkbutton(
+            self.columns_canvas,
+            variable=var,
+            command=lambda: self._on_pool_toggled(slot)
+        )
+        checkbox.bind("<MouseWheel>", self._on_mousewheel)
+        
+        window_id = self.columns_canvas.create_window(
+            0, 0, window=checkbox, anchor="w", state="hidden"
+        )
+        return [checkbox, var, window_id, -1]
+    
+    def _on_pool_toggled(self, slot: int):
+        """
+        复选框点击事件，同步到对应列的选中状态
+        
+        Args:
+            slot: 在复选框池中的位置
+        """
+        checkbox, var, _, index = self._pool[slot]
+        if index >= 0:
+            checked = var.get()
+            if checked != self._selected_mask[index]:
+                self._selected_mask[index] = checked
+                self._selected_count += 1 if checked else -1
+            self._on_selection_changed()
+    
+    def _on_scrollbar(self, *args):
+        """
+        滚动条拖动事件
+        """
+        self.columns_canvas.yview(*args)
+        self._render_viewport()
+    
+    def _on_canvas_configure(self, event=None):
+        """
+        画布尺寸变化事件
         """
-        result = ""
-        while index >= 0:
-            result = chr(65 + (index % 26)) + result
-            index = index // 26 - 1
-        return result
+        self._schedule_scrollregion()
+    
+    def _schedule_scrollregion(self):
+        """
+        在空闲时统一更新滚动区域并重绘，合并连续触发的尺寸变化和筛选
+        """
+        if self._scrollregion_after_id is None:
+            self._scrollregion_after_id = self.columns_canvas.after_idle(self._refresh_scrollregion)
+    
+    def _refresh_scrollregion(self):
+        """
+        更新滚动区域并重绘可视区域
+        """
+        self._scrollregion_after_id = None
+        self._update_scrollregion()
+        self._render_viewport()
     
     def _bind_mousewheel(self):
         """
         绑定鼠标滚轮事件
         """
-        def _on_mousewheel(event):
-            self.columns_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        self.columns_canvas.bind("<MouseWheel>", _on_mousewheel)
+        self.columns_canvas.bind("<MouseWheel>", self._on_mousewheel)
+    
+    def _on_mousewheel(self, event):
+        """
+        鼠标滚轮事件 - 累计滚动量，在空闲时一次性滚动并重绘
+        """
+        self._wheel_delta += int(-1*(event.delta/120))
+        if self._wheel_after_id is None:
+            self._wheel_after_id = self.columns_canvas.after_idle(self._flush_mousewheel)
+    
+    def _flush_mousewheel(self):
+        """
+        执行累计的滚轮滚动
+        """
+        delta, self._wheel_delta = self._wheel_delta, 0
+        self._wheel_after_id = None
+        if delta:
+            self.columns_canvas.yview_scroll(delta, "units")
+            self._render_viewport()
     
     def _on_selection_changed(self, *args):
         """
-        选择变化事件处理
+        选择变化事件处理 - 统计立即更新，选中列预览合并到稍后统一刷新
         """
         self._update_selection_count()
-        self._update_selected_preview()
+        if self._preview_after_id is None:
+            self._preview_after_id = self.window.after(_PREVIEW_DELAY_MS, self._update_selected_preview)
     
     def _update_selection_count(self):
         """
         更新选择统计
         """
         try:
-            selected_count = sum(1 for var in self.column_vars.values() if var.get())
+            selected_count = self._selected_count
             total_count = len(self.headers)
             remaining_count = total_count - selected_count
             
@@ -494,7 +627,11 @@ class ColumnSelector:
         更新选中列预览
         """
         try:
-            selected_columns = [header for header, var in self.column_vars.items() if var.get()]
+            self._preview_after_id = None
+            
+            # 最多显示前若干列，其余只显示数量
+            indices = np.flatnonzero(self._selected_mask)
+            selected_columns = [self.headers[i] for i in indices[:_PREVIEW_MAX_COLUMNS]]
             
             # 更新文本框
             self.selected_text.config(state="normal")
@@ -502,6 +639,8 @@ class ColumnSelector:
             
             if selected_columns:
                 preview_text = ", ".join(selected_columns)
+                if len(indices) > _PREVIEW_MAX_COLUMNS:
+                    preview_text += f", …（另有 {len(indices) - _PREVIEW_MAX_COLUMNS} 列）"
                 self.selected_text.insert(1.0, preview_text)
             else:
                 self.selected_text.insert(1.0, "(未选择任何列)")
@@ -513,41 +652,76 @@ class ColumnSelector:
     
     def _on_search_changed(self, *args):
         """
-        搜索内容变化事件
+        搜索内容变化事件 - 合并连续输入，停顿后再筛选
         """
-        # 实时搜索
-        self._filter_columns()
+        if self._filter_after_id is not None:
+            self.window.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.window.after(_SEARCH_DELAY_MS, self._filter_columns)
     
     def _filter_columns(self):
         """
-        根据搜索条件筛选列 - 适配多列布局
+        根据搜索条件筛选列
         """
         try:
-            search_text = self.search_var.get().lower().strip()
-            
-            # 遍历所有列框架
-            for col_frame in self.columns_inner_frame.winfo_children():
-                if isinstance(col_frame, ttk.Frame):
-                    # 遍历每列中的复选框框架
-                    for checkbox_frame in col_frame.winfo_children():
-                        if isinstance(checkbox_frame, ttk.Frame):
-                            # 查找复选框组件
-                            for child in checkbox_frame.winfo_children():
-                                if isinstance(child, ttk.Checkbutton):
-                                    checkbox_text = child.cget("text").lower()
-                                    if not search_text or search_text in checkbox_text:
-                                        checkbox_frame.pack(fill="x", padx=2, pady=2)
-                                    else:
-                                        checkbox_frame.pack_forget()
-                                    break
-            
-            # 更新滚动区域
-            self.columns_inner_frame.update_idletasks()
-            self.columns_canvas.configure(scrollregion=self.columns_canvas.bbox("all"))
+            # 立即筛选时取消尚未执行的延迟筛选
+            if self._filter_after_id is not None:
+                self.window.after_cancel(self._filter_after_id)
+                self._filter_after_id = None
+            
+            search_text = self.search_var.get().casefold().strip()
+            
+            if search_text and self._trigram_index is not None and len(search_text) >= 3:
+                self._visible_indices = self._search_by_trigrams(search_text)
+            elif search_text:
+                self._visible_indices = [
+                    i for i, header in enumerate(self._headers_cf) if search_text in header
+                ]
+            else:
+                self._visible_indices = list(range(len(self.headers)))
+            
+            # 回到顶部并重绘
+            self.columns_canvas.yview_moveto(0)
+            self._schedule_scrollregion()
             
         except Exception as e:
             logger.error(f"筛选列失败: {e}")
     
+    def _build_trigram_index(self) -> Optional[Dict[str, List[int]]]:
+        """
+        构建三字符子串到列索引的倒排索引（列数较少时不构建，直接线性查找）
+        
+        Returns:
+            Optional[Dict[str, List[int]]]: 倒排索引，列表中的索引按升序排列
+        """
+        if len(self.headers) < _TRIGRAM_MIN_HEADERS:
+            return None
+        
+        index = defaultdict(list)
+        for i, header in enumerate(self._headers_cf):
+            for trigram in {header[k:k + 3] for k in range(len(header) - 2)}:
+                index[trigram].append(i)
+        return dict(index)
+    
+    def _search_by_trigrams(self, search_text: str) -> List[int]:
+        """
+        通过倒排索引查找包含搜索文本的列
+        
+        Args:
+            search_text: 搜索文本（已做大小写折叠，至少3个字符）
+        
+        Returns:
+            List[int]: 匹配的列索引（升序）
+        """
+        # 取搜索文本所有三字符子串中最短的倒排列表作为候选，再逐个确认
+        candidates = None
+        for k in range(len(search_text) - 2):
+            postings = self._trigram_index.get(search_text[k:k + 3])
+            if postings is None:
+                return []
+            if candidates is None or len(postings) < len(candidates):
+                candidates = postings
+        return [i for i in candidates if search_text in self._headers_cf[i]]
+    
     def _clear_search(self):
         """
         清除搜索
@@ -559,22 +733,41 @@ class ColumnSelector:
         """
         全选所有列
         """
-        for var in self.column_vars.values():
-            var.set(True)
+        self._selected_mask[:] = 1
+        self._selected_count = len(self.headers)
+        self._refresh_selection()
     
     def _select_none(self):
         """
         取消选择所有列
         """
-        for var in self.column_vars.values():
-            var.set(False)
+        self._selected_mask[:] = 0
+        self._selected_count = 0
+        self._refresh_selection()
     
     def _invert_selection(self):
         """
         反选
         """
-        for var in self.column_vars.values():
-            var.set(not var.get())
+        self._selected_mask ^= 1
+        self._selected_count = len(self.headers) - self._selected_count
+        self._refresh_selection()
+    
+    def _refresh_selection(self):
+        """
+        选中状态批量变化后，重绘可视区域并更新统计
+        """
+        self._render_viewport()
+        self._on_selection_changed()
+    
+    def _get_selected_columns(self) -> List[str]:
+        """
+        获取已选择的列
+        
+        Returns:
+            List[str]: 已选择的列（按原始顺序）
+        """
+        return [self.headers[i] for i in np.flatnonzero(self._selected_mask)]
     
     def _apply_template(self):
         """
@@ -586,7 +779,7 @@ class ColumnSelector:
                 messagebox.showwarning("警告", "请先选择一个模板")
                 return
             
-            templates = self.config_manager.load_templates()
+            templates = self._templates_cache or {}
             if template_name not in templates:
                 messagebox.showerror("错误", "模板不存在")
                 return
@@ -594,19 +787,14 @@ class ColumnSelector:
             template = templates[template_name]
             template_columns = template.get("columns_to_delete", [])
             
-            # 先清除所有选择
-            self._select_none()
+            # 先清除所有选择，再应用模板选择（模糊匹配）
+            matched_indices = self._match_template_columns(template_columns)
+            matched_count = len(matched_indices)
             
-            # 应用模板选择（模糊匹配）
-            matched_count = 0
-            for template_col in template_columns:
-                for header in self.headers:
-                    if (template_col.lower() in header.lower() or 
-                        header.lower() in template_col.lower()):
-                        if header in self.column_vars:
-                            self.column_vars[header].set(True)
-                            matched_count += 1
-                        break
+            self._selected_mask[:] = 0
+            self._selected_mask[matched_indices] = 1
+            self._selected_count = int(self._selected_mask.sum())
+            self._refresh_selection()
             
             messagebox.showinfo(
                 "模板应用完成", 
@@ -619,13 +807,106 @@ class ColumnSelector:
             logger.error(f"应用模板失败: {e}")
             messagebox.showerror("错误", f"应用模板失败: {str(e)}")
     
+    def _match_template_columns(self, template_columns: List[str]) -> List[int]:
+        """
+        模糊匹配模板列：每个模板列取第一个与之互相包含（不区分大小写）的列标题
+        
+        匹配结果按模板列内容缓存，重复应用同一模板时直接返回
+        
+        Args:
+            template_columns: 模板中的列名列表
+        
+        Returns:
+            List[int]: 每个模板列匹配到的列索引（可能重复）
+        """
+        key = tuple(template_columns)
+        cached = self._template_match_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if self._headers_joined is None:
+            self._build_header_lookup()
+        
+        matched_indices = []
+        for template_col in template_columns:
+            template_cf = template_col.casefold()
+            # 两个方向各自找到第一个匹配的列，取靠前的一个
+            candidates = [i for i in (self._first_header_containing(template_cf),
+                                      self._first_header_within(template_cf)) if i >= 0]
+            if candidates:
+                matched_indices.append(min(candidates))
+        
+        self._template_match_cache[key] = matched_indices
+        return matched_indices
+    
+    def _build_header_lookup(self):
+        """
+        构建模板匹配用的查找结构：所有列标题拼接成的字符串及各列起始位置、列标题到首个索引的映射
+        """
+        self._header_starts = []
+        position = 0
+        for header in self._headers_cf:
+            self._header_starts.append(position)
+            position += len(header) + 1
+        self._headers_joined = "\n".join(self._headers_cf)
+        
+        self._header_first_index = {}
+        for i, header in enumerate(self._headers_cf):
+            self._header_first_index.setdefault(header, i)
+        self._header_lengths = sorted({len(header) for header in self._header_first_index})
+    
+    def _first_header_containing(self, text: str) -> int:
+        """
+        查找第一个包含指定文本的列标题（在拼接字符串上查找，跨越列边界的匹配会被跳过）
+        
+        Args:
+            text: 已做大小写折叠的文本
+        
+        Returns:
+            int: 列索引，未找到时为-1
+        """
+        if not self._header_starts:
+            return -1
+        
+        position = self._headers_joined.find(text)
+        while position != -1:
+            i = bisect_right(self._header_starts, position) - 1
+            if position + len(text) <= self._header_starts[i] + len(self._headers_cf[i]):
+                return i
+            # 该列剩余部分放不下文本，从下一列开头继续查找
+            if i + 1 >= len(self._header_starts):
+                return -1
+            position = self._headers_joined.find(text, self._header_starts[i + 1])
+        return -1
+    
+    def _first_header_within(self, text: str) -> int:
+        """
+        查找第一个被指定文本包含的列标题（只检查与某个列标题等长的子串）
+        
+        Args:
+            text: 已做大小写折叠的文本
+        
+        Returns:
+            int: 列索引，未找到时为-1
+        """
+        best = -1
+        first_index = self._header_first_index
+        for length in self._header_lengths:
+            if length > len(text):
+                break
+            for start in range(len(text) - length + 1):
+                i = first_index.get(text[start:start + length])
+                if i is not None and (best < 0 or i < best):
+                    best = i
+        return best
+    
     def _save_template(self):
         """
         保存当前选择为模板
         """
         try:
             # 获取当前选择的列
-            selected_columns = [header for header, var in self.column_vars.items() if var.get()]
+            selected_columns = self._get_selected_columns()
             
             if not selected_columns:
                 messagebox.showwarning("警告", "请先选择要删除的列")
@@ -655,8 +936,10 @@ class ColumnSelector:
             self.config_manager.add_template(template_name, selected_columns, description)
             
             # 重新加载模板列表
+            self._templates_cache = None
             self._load_templates()
-            self.template_var.set(template_name)
+            if self.template_var.get() != template_name:
+                self.template_var.set(template_name)
             
             messagebox.showinfo(
                 "保存成功", 
@@ -689,8 +972,10 @@ class ColumnSelector:
             if result:
                 if self.config_manager.delete_template(template_name):
                     # 重新加载模板列表
+                    self._templates_cache = None
                     self._load_templates()
-                    self.template_var.set("")
+                    if self.template_var.get():
+                        self.template_var.set("")
                     
                     messagebox.showinfo("删除成功", f"模板 '{template_name}' 已删除")
                     logger.info(f"删除模板: {template_name}")
@@ -706,8 +991,8 @@ class ColumnSelector:
         预览删除效果
         """
         try:
-            selected_columns = [header for header, var in self.column_vars.items() if var.get()]
-            remaining_columns = [header for header in self.headers if header not in selected_columns]
+            selected_columns = self._get_selected_columns()
+            remaining_columns = [self.headers[i] for i in np.flatnonzero(self._selected_mask == 0)]
             
             # 创建预览窗口
             preview_window = tk.Toplevel(self.window)
@@ -737,38 +1022,34 @@ class ColumnSelector:
             deleted_frame = ttk.Frame(notebook)
             notebook.add(deleted_frame, text=f"将删除的列 ({len(selected_columns)})")
             
-            deleted_text = tk.Text(deleted_frame, wrap=tk.WORD)
-            deleted_scrollbar = ttk.Scrollbar(deleted_frame, orient="vertical", command=deleted_text.yview)
-            deleted_text.configure(yscrollcommand=deleted_scrollbar.set)
+            deleted_list = tk.Listbox(deleted_frame, activestyle="none")
+            deleted_scrollbar = ttk.Scrollbar(deleted_frame, orient="vertical", command=deleted_list.yview)
+            deleted_list.configure(yscrollcommand=deleted_scrollbar.set)
             
-            deleted_text.pack(side="left", fill="both", expand=True)
+            deleted_list.pack(side="left", fill="both", expand=True)
             deleted_scrollbar.pack(side="right", fill="y")
             
             if selected_columns:
-                deleted_text.insert(1.0, "\n".join(selected_columns))
+                deleted_list.insert(tk.END, *selected_columns)
             else:
-                deleted_text.insert(1.0, "(没有选择要删除的列)")
-            
-            deleted_text.config(state="disabled")
+                deleted_list.insert(tk.END, "(没有选择要删除的列)")
             
             # 保留的列标签页
             remaining_frame = ttk.Frame(notebook)
             notebook.add(remaining_frame, text=f"将保留的列 ({len(remaining_columns)})")
             
-            remaining_text = tk.Text(remaining_frame, wrap=tk.WORD)
-            remaining_scrollbar = ttk.Scrollbar(remaining_frame, orient="vertical", command=remaining_text.yview)
-            remaining_text.configure(yscrollcommand=remaining_scrollbar.set)
+            remaining_list = tk.Listbox(remaining_frame, activestyle="none")
+            remaining_scrollbar = ttk.Scrollbar(remaining_frame, orient="vertical", command=remaining_list.yview)
+            remaining_list.configure(yscrollcommand=remaining_scrollbar.set)
             
-            remaining_text.pack(side="left", fill="both", expand=True)
+            remaining_list.pack(side="left", fill="both", expand=True)
             remaining_scrollbar.pack(side="right", fill="y")
             
             if remaining_columns:
-                remaining_text.insert(1.0, "\n".join(remaining_columns))
+                remaining_list.insert(tk.END, *remaining_columns)
             else:
-                remaining_text.insert(1.0, "(所有列都将被删除 - 这是不允许的!)")
-                remaining_text.config(fg="red")
-            
-            remaining_text.config(state="disabled")
+                remaining_list.insert(tk.END, "(所有列都将被删除 - 这是不允许的!)")
+                remaining_list.config(fg="red")
             
             # 关闭按钮
             close_btn = ttk.Button(main_frame, text="关闭", command=preview_window.destroy)
@@ -783,35 +1064,35 @@ class ColumnSelector:
         确认选择
         """
         try:
-            selected_columns = [header for header, var in self.column_vars.items() if var.get()]
+            selected_count = self._selected_count
+            remaining_count = len(self.headers) - selected_count
             
             # 验证选择
-            if not selected_columns:
+            if selected_count == 0:
                 messagebox.showwarning("警告", "请至少选择一列要删除")
                 return
             
-            remaining_columns = [header for header in self.headers if header not in selected_columns]
-            if not remaining_columns:
+            if remaining_count == 0:
                 messagebox.showerror("错误", "不能删除所有列，请至少保留一列数据")
                 return
             
             # 确认对话框
             result = messagebox.askyesno(
                 "确认选择",
-                f"确定要删除选中的 {len(selected_columns)} 列吗？\n\n"
-                f"删除后将保留 {len(remaining_columns)} 列数据。",
+                f"确定要删除选中的 {selected_count} 列吗？\n\n"
+                f"删除后将保留 {remaining_count} 列数据。",
                 parent=self.window
             )
             
             if result:
                 # 调用回调函数
                 if self.callback:
-                    self.callback(selected_columns)
+                    self.callback(self._get_selected_columns())
                 
                 # 关闭窗口
-                self.window.destroy()
+                self._cleanup_and_close()
                 
-                logger.info(f"确认选择 {len(selected_columns)} 列删除")
+                logger.info(f"确认选择 {selected_count} 列删除")
             
         except Exception as e:
             logger.error(f"确认选择失败: {e}")
@@ -821,9 +1102,35 @@ class ColumnSelector:
         """
         取消选择
         """
-        self.window.destroy()
+        self._cleanup_and_close()
         logger.info("取消列选择")
     
+    def _cleanup_and_close(self):
+        """
+        取消待执行任务、解除事件绑定后关闭窗口，使选择器及其数据能被及时回收
+        """
+        try:
+            for after_id in (self._filter_after_id, self._preview_after_id):
+                if after_id is not None:
+                    self.window.after_cancel(after_id)
+            for after_id in (self._wheel_after_id, self._scrollregion_after_id):
+                if after_id is not None:
+                    self.columns_canvas.after_cancel(after_id)
+            self._filter_after_id = self._preview_after_id = None
+            self._wheel_after_id = self._scrollregion_after_id = None
+            
+            self.search_var.trace_vdelete("w", self._search_trace_id)
+            self.columns_canvas.unbind("<MouseWheel>")
+            self.columns_canvas.unbind("<Configure>")
+            for checkbox, *_ in self._pool:
+                checkbox.unbind("<MouseWheel>")
+            self._pool = []
+            
+        except Exception as e:
+            logger.error(f"清理列选择器失败: {e}")
+        finally:
+            self.window.destroy()
+    
     def show(self):
         """
         显示选择器窗口
@@ -8,6 +8,7 @@ import tkinter as tk
 from tkinterdnd2 import TkinterDnD, DND_FILES
 from tkinter import ttk, filedialog, messagebox
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
 
 from src.core.excel_reader import ExcelReader
@@ -22,6 +23,15 @@ from src.ui.progress_dialog import ProgressDialog
 
 logger = get_logger("MainWindow")
 
+# 支持拖拽加载的Excel文件扩展名
+_EXCEL_EXT = frozenset(('.xlsx', '.xls'))
+
+# 工作表选择防抖延迟（毫秒）
+_WORKSHEET_SELECT_DELAY_MS = 200
+
+# 批量文件数不超过该值时直接展开文件列表，否则展开节点时再填充
+_BATCH_TREE_EAGER_LIMIT = 50
+
 class MainWindow:
     """
     主窗口类
@@ -50,6 +60,23 @@ class MainWindow:
         self.batch_files = []  # 批量文件列表
         self.is_batch_mode = False  # 是否为批量模式
         
+        # 缓存：键为 (文件路径, 工作表名, 修改时间)，文件变化后自动失效
+        self._stats_cache: Dict[tuple, Dict[str, Any]] = {}
+        self._headers_cache: Dict[tuple, list] = {}
+        self._ws_meta: Dict[tuple, Dict[str, list]] = {}
+        
+        # 批量模式下第一个文件的读取器（工作表信息与列选择器共用）
+        self._batch_preview_reader: Optional[ExcelReader] = None
+        
+        # 待填充的批量文件列表节点（展开时才插入文件行）
+        self._batch_files_item = None
+        
+        # 工作表选择防抖定时器
+        self._ws_after_id = None
+        
+        # 后台统计计算使用的线程池
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        
         # 初始化界面
         self._setup_window()
         self._create_widgets()
@@ -67,12 +94,7 @@ class MainWindow:
         self.root.minsize(800, 600)
         
         # 设置窗口图标（如果有的话）
-        try:
-            logger.info(f"拖放事件数据: {event.data}")
-            # self.root.iconbitmap("icon.ico")
-            pass
-        except:
-            pass
+        # self.root.iconbitmap("icon.ico")
         
         # 居中显示窗口
         self._center_window()
@@ -389,18 +411,18 @@ class MainWindow:
             # 获取拖拽的文件列表
             files = self.root.tk.splitlist(event.data)
             
-            # 过滤出Excel文件
-            excel_files = []
-            for file_path in files:
-                if file_path.lower().endswith(('.xlsx', '.xls')):
-                    excel_files.append(file_path)
+            # 过滤出Excel文件（只比较扩展名，无需转换整个路径）
+            excel_files = [
+                file_path for file_path in files
+                if os.path.splitext(file_path)[1].lower() in _EXCEL_EXT
+            ]
             
             if not excel_files:
                 messagebox.showwarning("文件类型错误", "请拖拽Excel文件（.xlsx 或 .xls）")
                 return
             
-            logger.info(f"拖拽事件数据: {event.data}")
-            logger.info(f"检测到Excel文件: {excel_files}")
+            logger.info("拖拽事件数据: %s", event.data)
+            logger.info("检测到Excel文件: %s", excel_files)
             
             if len(excel_files) == 1:
                 # 单文件模式
@@ -423,6 +445,9 @@ class MainWindow:
         # 绑定拖拽事件到文件选择区域
         self.file_frame.drop_target_register(DND_FILES)
         self.file_frame.dnd_bind('<<Drop>>', self._on_drop)
+        
+        # 批量文件列表展开时按需填充
+        self.info_tree.bind("<<TreeviewOpen>>", self._on_info_tree_open)
 
     def _select_file(self):
         """
@@ -472,6 +497,7 @@ class MainWindow:
             if self.excel_reader.load_file(file_path):
                 self.current_file_path = file_path
                 self.is_batch_mode = False
+                self._close_batch_preview_reader()
                 
                 # 更新界面
                 self._update_file_info()
@@ -482,7 +508,7 @@ class MainWindow:
                 target_worksheet = self.excel_reader.get_target_worksheet()
                 if target_worksheet:
                     self.worksheet_var.set(target_worksheet)
-                    self._on_worksheet_selected()
+                    self._do_worksheet_selection()
                 
                 self._update_status("文件加载成功")
                 logger.info(f"文件加载成功: {file_path}")
@@ -537,7 +563,14 @@ class MainWindow:
         """
         清除当前文件
         """
+        if self._ws_after_id:
+            self.root.after_cancel(self._ws_after_id)
+            self._ws_after_id = None
         self.excel_reader.close()
+        self._close_batch_preview_reader()
+        self._stats_cache.clear()
+        self._headers_cache.clear()
+        self._ws_meta.clear()
         self.current_file_path = None
         self.current_worksheet = None
         self.selected_columns_to_delete = []
@@ -560,8 +593,7 @@ class MainWindow:
         """
         try:
             # 清除现有信息
-            for item in self.info_tree.get_children():
-                self.info_tree.delete(item)
+            self._clear_file_info()
             
             # 获取文件信息
             file_info = self.excel_reader.get_file_info()
@@ -592,8 +624,7 @@ class MainWindow:
         """
         try:
             # 清除现有信息
-            for item in self.info_tree.get_children():
-                self.info_tree.delete(item)
+            self._clear_file_info()
             
             # 添加批量文件信息
             self.info_tree.insert("", "end", text="处理模式", values=("批量处理",))
@@ -601,16 +632,74 @@ class MainWindow:
             
             # 添加文件列表
             files_item = self.info_tree.insert("", "end", text="文件列表", values=("",))
-            for i, file_path in enumerate(self.batch_files, 1):
-                file_name = os.path.basename(file_path)
-                self.info_tree.insert(files_item, "end", text=f"  {i}. {file_name}", values=("",))
-            
-            # 展开文件列表
-            self.info_tree.item(files_item, open=True)
+            if len(self.batch_files) <= _BATCH_TREE_EAGER_LIMIT:
+                self._populate_batch_files(files_item)
+                
+                # 展开文件列表
+                self.info_tree.item(files_item, open=True)
+            else:
+                # 文件较多时先插入占位节点，展开时再填充
+                self._batch_files_item = files_item
+                self.info_tree.insert(files_item, "end", text="  加载中...", values=("",))
             
         except Exception as e:
             logger.error(f"更新批量文件信息失败: {e}")
     
+    def _populate_batch_files(self, files_item: str):
+        """
+        在文件列表节点下插入批量文件
+        
+        Args:
+            files_item: 文件列表节点ID
+        """
+        for i, file_path in enumerate(self.batch_files, 1):
+            file_name = os.path.basename(file_path)
+            self.info_tree.insert(files_item, "end", text=f"  {i}. {file_name}", values=("",))
+    
+    def _on_info_tree_open(self, event=None):
+        """
+        信息树节点展开事件，首次展开批量文件列表时填充子节点
+        """
+        files_item = self._batch_files_item
+        if not files_item or self.info_tree.focus() != files_item:
+            return
+        
+        self._batch_files_item = None
+        try:
+            self.info_tree.delete(*self.info_tree.get_children(files_item))
+            self._populate_batch_files(files_item)
+        except Exception as e:
+            logger.error(f"加载批量文件列表失败: {e}")
+    
+    def _get_batch_preview_reader(self, file_path: str) -> Optional[ExcelReader]:
+        """
+        获取批量模式下第一个文件的读取器，同一文件只加载一次
+        
+        Args:
+            file_path: 第一个文件的路径
+            
+        Returns:
+            Optional[ExcelReader]: 已加载的读取器，加载失败时返回None
+        """
+        reader = self._batch_preview_reader
+        if reader is not None and reader.file_path == file_path:
+            return reader
+        
+        self._close_batch_preview_reader()
+        reader = ExcelReader()
+        if not reader.load_file(file_path):
+            return None
+        self._batch_preview_reader = reader
+        return reader
+    
+    def _close_batch_preview_reader(self):
+        """
+        关闭批量模式的预览读取器
+        """
+        if self._batch_preview_reader is not None:
+            self._batch_preview_reader.close()
+            self._batch_preview_reader = None
+    
     def _load_batch_worksheet_info(self, first_file_path: str):
         """
         加载批量模式下的工作表信息
@@ -619,10 +708,10 @@ class MainWindow:
             first_file_path: 第一个文件的路径
         """
         try:
-            # 临时加载第一个文件获取工作表信息
-            temp_reader = ExcelReader()
-            if temp_reader.load_file(first_file_path):
-                worksheets = temp_reader.get_worksheets_list()
+            # 加载第一个文件获取工作表信息（读取器保留供列选择器复用）
+            preview_reader = self._get_batch_preview_reader(first_file_path)
+            if preview_reader:
+                worksheets = preview_reader.get_worksheets_list()
                 
                 if worksheets:
                     # 尝试找到"发票基础信息"工作表
@@ -660,8 +749,12 @@ class MainWindow:
         """
         清除文件信息显示
         """
-        for item in self.info_tree.get_children():
-            self.info_tree.delete(item)
+        self._batch_files_item = None
+        
+        # 一次调用删除所有顶层节点（子节点随之删除），避免逐行删除
+        children = self.info_tree.get_children()
+        if children:
+            self.info_tree.delete(*children)
     
     def _update_worksheet_list(self):
         """
@@ -698,22 +791,114 @@ class MainWindow:
                 self.stats_info_var.set("请先选择Excel文件和工作表")
                 return
             
-            # 读取当前工作表的数据
-            data = self.excel_reader.read_full_data(self.current_worksheet)
+            # 同一文件同一工作表重复选择时直接使用缓存结果
+            file_path = self.current_file_path
+            worksheet = self.current_worksheet
+            key = self._sheet_cache_key(file_path, worksheet)
+            stats_result = self._stats_cache.get(key) if key else None
+            if stats_result is not None:
+                self._apply_stats(file_path, worksheet, stats_result)
+                return
+            
+            # 读取与求和在后台线程执行，结果回到主线程显示
+            self.stats_info_var.set("正在计算统计信息...")
+            headers = self._headers_cache.get(key) if key else None
+            future = self._executor.submit(self._compute_stats, file_path, worksheet, headers)
+            future.add_done_callback(
+                lambda f: self.root.after(0, self._on_stats_done, file_path, worksheet, key, f)
+            )
+                
+        except Exception as e:
+            logger.error(f"更新数据统计失败: {e}")
+            self.stats_info_var.set("统计信息计算失败")
+    
+    def _compute_stats(self, file_path: str, worksheet: str,
+                       headers: Optional[list] = None) -> tuple:
+        """
+        读取工作表并计算数值列统计（在后台线程中执行）
+        
+        使用独立的读取器和数据处理器，不访问主线程的读取器、处理器和缓存；
+        读取器只加载所选工作表，存在价税合计列时只读取并汇总该列，否则读取整表统计所有数值列
+        
+        Args:
+            file_path: 文件路径
+            worksheet: 工作表名称
+            headers: 已缓存的表头，为None时从文件读取
+            
+        Returns:
+            tuple: (表头列表, 统计结果)，工作表没有数据时统计结果为None
+        """
+        reader = ExcelReader()
+        try:
+            if not reader.load_file(file_path, sheet_names=[worksheet]):
+                raise ValueError(f"无法加载文件: {file_path}")
+            
+            if headers is None:
+                headers = reader.read_headers(worksheet) or []
+            for header in headers:
+                if isinstance(header, str) and ('价税合计' in header or '合计' in header):
+                    column_stats = reader.sum_column(worksheet, header)
+                    if column_stats:
+                        return headers, {
+                            'success': True,
+                            'sums': {header: column_stats},
+                            'price_tax_total_column': header
+                        }
+                    break
+            
+            data = reader.read_full_data(worksheet)
             if data.empty:
-                self.stats_info_var.set("当前工作表没有数据")
+                return headers, None
+            return headers, DataProcessor().calculate_all_numeric_sums(data)
+        finally:
+            reader.close()
+    
+    def _on_stats_done(self, file_path: str, worksheet: str, key: Optional[tuple], future):
+        """
+        后台统计完成回调（在主线程中执行）
+        
+        Args:
+            file_path: 提交任务时的文件路径
+            worksheet: 提交任务时的工作表名称
+            key: 统计缓存键
+            future: 后台任务
+        """
+        try:
+            headers, stats_result = future.result()
+        except Exception as e:
+            logger.error(f"更新数据统计失败: {e}")
+            if file_path == self.current_file_path and worksheet == self.current_worksheet:
+                self.stats_info_var.set("统计信息计算失败")
+            return
+        
+        # 结果来自提交时的文件，缓存只在主线程中更新
+        if key and headers:
+            self._headers_cache.setdefault(key, headers)
+        if key and stats_result and stats_result.get('success'):
+            self._stats_cache[key] = stats_result
+        self._apply_stats(file_path, worksheet, stats_result)
+    
+    def _apply_stats(self, file_path: str, worksheet: str, stats_result: Optional[Dict[str, Any]]):
+        """
+        显示统计结果
+        
+        Args:
+            file_path: 统计对应的文件路径
+            worksheet: 统计对应的工作表名称
+            stats_result: 统计结果，None表示工作表没有数据
+        """
+        try:
+            # 期间已切换文件或工作表时丢弃过期结果
+            if file_path != self.current_file_path or worksheet != self.current_worksheet:
                 return
             
-            # 计算数值列统计
-            stats_result = self.data_processor.calculate_all_numeric_sums(data)
+            if stats_result is None:
+                self.stats_info_var.set("当前工作表没有数据")
+                return
             
             if stats_result['success'] and stats_result['sums']:
-                # 查找价税合计列
-                price_tax_total_col = None
-                for col_name in stats_result['sums'].keys():
-                    if '价税合计' in col_name or '合计' in col_name:
-                        price_tax_total_col = col_name
-                        break
+                # 价税合计列由统计结果直接给出
+                price_tax_total_col = stats_result.get('price_tax_total_column')
                 
                 if price_tax_total_col:
                     # 显示价税合计信息
@@ -735,6 +920,72 @@ class MainWindow:
             logger.error(f"更新数据统计失败: {e}")
             self.stats_info_var.set("统计信息计算失败")
     
+    def _sheet_cache_key(self, file_path: str, worksheet: str) -> Optional[tuple]:
+        """
+        生成工作表级缓存的键
+        
+        Args:
+            file_path: 文件路径
+            worksheet: 工作表名称
+            
+        Returns:
+            Optional[tuple]: (文件路径, 工作表名, 修改时间)，文件不可访问时返回None
+        """
+        try:
+            return (file_path, worksheet, os.path.getmtime(file_path))
+        except OSError:
+            return None
+    
+    def _read_headers_cached(self, reader: ExcelReader, file_path: str, worksheet: str) -> list:
+        """
+        读取表头，同一文件同一工作表只读取一次
+        
+        Args:
+            reader: 已加载该文件的读取器
+            file_path: 文件路径
+            worksheet: 工作表名称
+            
+        Returns:
+            list: 表头列表
+        """
+        key = self._sheet_cache_key(file_path, worksheet)
+        headers = self._headers_cache.get(key) if key else None
+        if headers is None:
+            headers = reader.read_headers(worksheet)
+            if key and headers:
+                self._headers_cache[key] = headers
+        return headers
+    
+    def _get_ws_meta(self, file_path: str, worksheet: str) -> Dict[str, list]:
+        """
+        获取工作表的表头与数值列信息（按文件修改时间缓存）
+        
+        Args:
+            file_path: 文件路径
+            worksheet: 工作表名称
+            
+        Returns:
+            Dict[str, list]: 包含headers、numeric_columns、numeric_headers
+        """
+        key = self._sheet_cache_key(file_path, worksheet)
+        ws_meta = self._ws_meta.get(key) if key else None
+        if ws_meta is None:
+            headers = self._read_headers_cached(self.excel_reader, file_path, worksheet) or []
+            numeric_columns = []
+            if headers:
+                full_data = self.excel_reader.read_full_data(worksheet)
+                numeric_columns = self.data_processor.get_numeric_columns_for_summary(full_data)
+            numeric_set = set(numeric_columns)
+            
+            ws_meta = {
+                'headers': headers,
+                'numeric_columns': numeric_columns,
+                'numeric_headers': [header for header in headers if header in numeric_set]
+            }
+            if key and headers:
+                self._ws_meta[key] = ws_meta
+        return ws_meta
+    
     def _clear_data_stats(self):
         """
         清除数据统计信息
@@ -749,8 +1000,17 @@ class MainWindow:
     
     def _on_worksheet_selected(self, event=None):
         """
-        工作表选择事件处理
+        工作表选择事件处理（防抖，连续切换时只处理最后一次选择）
+        """
+        if self._ws_after_id:
+            self.root.after_cancel(self._ws_after_id)
+        self._ws_after_id = self.root.after(_WORKSHEET_SELECT_DELAY_MS, self._do_worksheet_selection)
+    
+    def _do_worksheet_selection(self):
+        """
+        处理当前选中的工作表
         """
+        self._ws_after_id = None
         try:
             selected_worksheet = self.worksheet_var.get()
             if selected_worksheet:
@@ -827,11 +1087,11 @@ class MainWindow:
                     messagebox.showwarning("警告", "没有选择批量文件")
                     return
                 
-                # 临时加载第一个文件获取表头
-                temp_reader = ExcelReader()
-                if temp_reader.load_file(self.batch_files[0]):
+                # 复用第一个文件的预览读取器获取表头
+                preview_reader = self._get_batch_preview_reader(self.batch_files[0])
+                if preview_reader:
                     # 尝试找到"发票基础信息"工作表
-                    worksheets = temp_reader.get_worksheets_list()
+                    worksheets = preview_reader.get_worksheets_list()
                     target_worksheet = None
                     
                     for ws in worksheets:
@@ -843,7 +1103,9 @@ class MainWindow:
                         target_worksheet = worksheets[0]['name']
                     
                     if target_worksheet:
-                        headers = temp_reader.read_headers(target_worksheet)
+                        headers = self._read_headers_cached(
+                            preview_reader, self.batch_files[0], target_worksheet
+                        )
                 
                 if not headers:
                     messagebox.showerror("错误", "无法从批量文件中读取表头信息")
@@ -854,7 +1116,9 @@ class MainWindow:
                     messagebox.showwarning("警告", "请先选择工作表")
                     return
                 
-                headers = self.excel_reader.read_headers(self.current_worksheet)
+                headers = self._read_headers_cached(
+                    self.excel_reader, self.current_file_path, self.current_worksheet
+                )
                 if not headers:
                     messagebox.showerror("错误", "无法读取表头信息")
                     return
@@ -900,24 +1164,14 @@ class MainWindow:
                 messagebox.showwarning("警告", "请先选择工作表")
                 return
             
-            # 读取表头
-            headers = self.excel_reader.read_headers(self.current_worksheet)
-            if not headers:
+            # 表头与数值列按工作表缓存，重复打开时无需重新读取整表
+            ws_meta = self._get_ws_meta(self.current_file_path, self.current_worksheet)
+            if not ws_meta['headers']:
                 messagebox.showerror("错误", "无法读取表头")
                 return
             
-            # 获取可用于求和的数值列
-            full_data = self.excel_reader.read_full_data(self.current_worksheet)
-            numeric_columns = self.data_processor.get_numeric_columns_for_summary(full_data)
-            
-            if not numeric_columns:
-                messagebox.showinfo("提示", "当前工作表没有可用于求和的数值列")
-                return
-            
-            # 过滤出数值列的表头
-            numeric_headers = [header for header in headers if header in numeric_columns]
-            
-            if not numeric_headers:
+            numeric_columns = ws_meta['numeric_columns']
+            if not numeric_columns or not ws_meta['numeric_headers']:
                 messagebox.showinfo("提示", "当前工作表没有可用于求和的数值列")
                 return
             
@@ -1175,19 +1429,25 @@ class MainWindow:
                 self.root.after(0, lambda: self.progress_dialog.update_progress(65, "执行跨工作表数据关联..."))
                 
                 try:
-                    # 获取所有工作表数据
-                    all_sheets = self.excel_reader.get_all_worksheets_data()
-                    if all_sheets and self.data_processor.load_cross_sheet_data(all_sheets):
-                        # 尝试自动识别发票基础信息表和明细表
-                        invoice_sheet = self.current_worksheet  # 当前选择的工作表作为发票基础信息表
-                        detail_sheet = None
-                        
-                        # 查找包含更多列的工作表作为明细表
-                        for sheet_name in all_sheets.keys():
-                            if sheet_name != invoice_sheet and len(all_sheets[sheet_name].columns) > len(all_sheets[invoice_sheet].columns):
-                                detail_sheet = sheet_name
-                                break
-                        
+                    # 尝试自动识别发票基础信息表和明细表
+                    worksheets_info = self.excel_reader.worksheets_info
+                    invoice_sheet = self.current_worksheet  # 当前选择的工作表作为发票基础信息表
+                    detail_sheet = None
+                    
+                    # 查找包含更多列的工作表作为明细表（按表头信息判断，无需读取数据）
+                    for sheet_name, info in worksheets_info.items():
+                        if sheet_name != invoice_sheet and info['max_column'] > worksheets_info[invoice_sheet]['max_column']:
+                            detail_sheet = sheet_name
+                            break
+                    
+                    # 发票基础信息表读取完整数据，明细表只读取关联所需的列
+                    cross_sheets = {invoice_sheet: self.excel_reader.read_full_data(invoice_sheet)}
+                    if detail_sheet:
+                        cross_sheets[detail_sheet] = self.excel_reader.read_columns(
+                            detail_sheet, list(self.data_processor.DETAIL_SHEET_COLUMNS)
+                        )
+                    
+                    if not cross_sheets[invoice_sheet].empty and self.data_processor.load_cross_sheet_data(cross_sheets):
                         if detail_sheet:
                             success = self.data_processor.process_cross_sheet_association(
                                 invoice_sheet, detail_sheet
@@ -1554,7 +1814,9 @@ class MainWindow:
         """
         try:
             # 清理资源
+            self._executor.shutdown(wait=False, cancel_futures=True)
             self.excel_reader.close()
+            self._close_batch_preview_reader()
             
             # 关闭窗口
             self.root.destroy()
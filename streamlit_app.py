@@ -497,20 +497,27 @@ def process_data(add_border=True, enable_cross_sheet=False):
             if enable_cross_sheet:
                 st.info("🔗 正在执行跨工作表数据关联...")
                 try:
-                    # 获取所有工作表数据
-                    all_sheets = st.session_state.excel_reader.get_all_worksheets_data()
+                    # 查找发票基础信息表和信息汇总表（按工作表名称判断，无需读取数据）
+                    excel_reader = st.session_state.excel_reader
+                    invoice_sheet = None
+                    summary_sheet = None
                     
-                    if all_sheets and st.session_state.data_processor.load_cross_sheet_data(all_sheets):
-                        # 查找发票基础信息表和信息汇总表
-                        invoice_sheet = None
-                        summary_sheet = None
-                        
-                        for sheet_name in all_sheets.keys():
-                            if "发票基础信息" in sheet_name or "基础信息" in sheet_name:
-                                invoice_sheet = sheet_name
-                            elif "信息汇总表" in sheet_name or "汇总表" in sheet_name or "信息汇总" in sheet_name:
-                                summary_sheet = sheet_name
-                        
+                    for sheet_name in excel_reader.worksheets_info.keys():
+                        if "发票基础信息" in sheet_name or "基础信息" in sheet_name:
+                            invoice_sheet = sheet_name
+                        elif "信息汇总表" in sheet_name or "汇总表" in sheet_name or "信息汇总" in sheet_name:
+                            summary_sheet = sheet_name
+                    
+                    # 发票基础信息表读取完整数据，信息汇总表只读取关联所需的列
+                    cross_sheets = {}
+                    if invoice_sheet:
+                        cross_sheets[invoice_sheet] = excel_reader.read_full_data(invoice_sheet)
+                    if summary_sheet:
+                        cross_sheets[summary_sheet] = excel_reader.read_columns(
+                            summary_sheet, list(st.session_state.data_processor.DETAIL_SHEET_COLUMNS)
+                        )
+                    
+                    if st.session_state.data_processor.load_cross_sheet_data(cross_sheets):
                         if invoice_sheet and summary_sheet:
                             st.info(f"📋 找到发票基础信息表: {invoice_sheet}")
                             st.info(f"📋 找到信息汇总表: {summary_sheet}")